@@ -1,17 +1,73 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient
 
 
 class Settings(BaseSettings):
     MONGO_URL: str
     SECRET_KEY: str
 
+    # MongoDB connection pool / timeouts
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_TIMEOUT_MS: int = 5000          # server selection + connect
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    MONGO_WRITE_CONCERN: str = "1"        # "1", "majority", ...
+    MONGO_ENSURE_INDEXES: bool = True     # create the services' indexes at startup
+    EXPORT_BATCH_SIZE: int = 2000         # documents per cursor batch in streaming exports
+    PENDING_REFRESH_S: float = 5.0        # pending-queue rebuild interval when change streams are unavailable
+
+    # Nearby SOS / team queries: "auto" (2dsphere, in-memory if MongoDB refuses), "mongo" or "memory"
+    GEO_BACKEND: str = "auto"
+    GEO_REFRESH_S: float = 30.0           # in-memory index reload interval (other workers' writes)
+
+    # WebSocket fan-out
+    WS_QUEUE_SIZE: int = 100              # per-client pending messages
+    WS_SEND_TIMEOUT: float = 5.0          # seconds before a stuck send drops the client
+    WS_MAX_OVERFLOWS: int = 10            # consecutive full-queue broadcasts before dropping
+    WS_BUS: str = "local"                 # "local" (one worker) or "mongo" (several workers / hosts)
+    WS_BUS_COLLECTION: str = "ws_events"  # capped collection used by the mongo bus
+    WS_BUS_SIZE_BYTES: int = 16 * 1024 * 1024
+
+    # Flood / severity forest evaluation: "sklearn" or "compiled" (flat NumPy node tables)
+    ML_ENGINE: str = "sklearn"
+    ML_ARTIFACTS_DIR: Optional[str] = None  # defaults to app/ml_models/artifacts
+    ML_PRELOAD: bool = False              # load models at startup instead of on first prediction
+
+    # Prediction cache (0 disables); float inputs are bucketed by these steps before keying
+    ML_CACHE_SIZE: int = 10000
+    ML_CACHE_TTL: float = 600.0           # seconds
+    ML_CACHE_QUANTUM: Dict[str, float] = {"temp": 0.1, "ice": 0.01, "veg": 0.01, "rain_mm": 1.0}
+    ML_CACHE_DEDUPE_INSERTS: bool = False  # skip the prediction log write on cache hits
+
+    # Prediction audit log: queued and written in batches by a background task
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_MS: float = 200.0
+    AUDIT_DURABILITY: str = "fire_and_forget"  # or "ack": wait until MongoDB has the batch
+
+    # Flood model micro-batching (concurrent single predictions)
+    ML_BATCH_SIZE: int = 256              # max rows per forest evaluation
+    ML_BATCH_WAIT_MS: float = 5.0         # max time the first row waits for company
+
     class Config:
         env_file = ".env"
 
 settings = Settings()
 
-client = MongoClient(settings.MONGO_URL)
+
+def _write_concern(value: str):
+    return int(value) if value.isdigit() else value
+
+
+client = AsyncMongoClient(
+    settings.MONGO_URL,
+    maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+    minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+    serverSelectionTimeoutMS=settings.MONGO_TIMEOUT_MS,
+    connectTimeoutMS=settings.MONGO_TIMEOUT_MS,
+    socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+    w=_write_concern(settings.MONGO_WRITE_CONCERN),
+)
 db = client.get_database()  # auto picks minarah
 # 👈 database name set here
-
@@ -1,18 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from pymongo.errors import PyMongoError
 from .config import settings
+from .utils.streaming import NEXT_CURSOR_HEADER
+from .services.sos_service import sos_service
+from .services.rescue_team_service import rescue_team_service
+from .services.user_service import user_service
+from .services.ml_service import prediction_service
+from .ml_models.loader import artifacts
 from .routes.user_routes import router as user_router
 from .routes.sos_routes import router as sos_router
 from .routes.ml_routes import router as ml_router 
 # from .routes.admin_routes import router as admin_router
 from .routes.rescue_team_routes import router as rescue_router
 from .routes.route_routes import router as route_router
-from .websockets.ws_manager import router as ws_router
+from .websockets.ws_manager import router as ws_router, ws_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Indexes the hot queries rely on (existing ones are left alone)
+    if settings.MONGO_ENSURE_INDEXES:
+        try:
+            for service in (sos_service, rescue_team_service, user_service):
+                await service.ensure_indexes()
+        except PyMongoError as e:
+            print(f"⚠️ Index provisioning failed: {e}")
+    # Pending-SOS queue: rebuilt by the change-stream watcher, kept in sync after
+    watcher = asyncio.create_task(sos_service.watch_pending())
+    # WebSocket event bus (relays broadcasts between workers when WS_BUS=mongo)
+    await ws_manager.start()
+    # Models load lazily on first prediction unless asked to warm up now
+    if settings.ML_PRELOAD:
+        await asyncio.to_thread(artifacts.preload)
+
+    yield
+
+    await ws_manager.stop()
+    await prediction_service.batcher.stop()
+    # flush queued prediction log writes before the process exits
+    await prediction_service.audit.drain()
+    watcher.cancel()
 
 
 app = FastAPI(
     title="Minarah API",
     version="1.0",
+    lifespan=lifespan,
 )
 
 # CORS setup
@@ -22,6 +58,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # keyset pagination of the list endpoints
 )
 
 @app.get("/")
@@ -0,0 +1,209 @@
+import json
+import os
+import joblib
+import numpy as np
+
+TREE_LEAF = -1
+
+
+class CompiledForest:
+    """
+    A fitted sklearn random-forest classifier flattened into one node table.
+
+    Every tree's nodes are renumbered breadth-first so the two children of
+    a node are adjacent, then concatenated into parallel arrays
+    (``feature``, ``threshold``, ``left``) plus a per-node class-probability
+    table ``value``.  One step down the tree is ``left[n] + (x > threshold[n])``;
+    leaves point at themselves with an infinite threshold, so all rows
+    descend in lock-step for ``depth`` steps.  Evaluation is vectorised
+    over rows x trees in NumPy.
+
+    Outputs are identical to ``predict_proba`` / ``predict`` of the source
+    model: sklearn compares float32 inputs against float64 thresholds, so
+    thresholds are stored as the largest float32 not above them (same
+    decision for every float32 input), and tree probabilities are summed in
+    estimator order before dividing by the number of trees.  Rows are
+    evaluated in chunks so the working arrays stay in cache.  Inputs must
+    not contain NaN.
+
+    ``preprocessor`` (e.g. the leading steps of a Pipeline) is applied to X
+    first, so a whole ``Pipeline(..., RandomForestClassifier)`` compiles too.
+    """
+
+    CHUNK_ROWS = 128
+    ARRAYS = ("feature", "threshold", "left", "value", "roots", "classes_")
+    META_FILE = "forest_meta.json"
+    PREPROCESSOR_FILE = "preprocessor.pkl"
+
+    def __init__(self, feature, threshold, left, value, roots, depth, classes, preprocessor=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.classes_ = classes
+        self.preprocessor = preprocessor
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def num_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.value, self.roots))
+
+    # -------------------------------
+    # Build
+    # -------------------------------
+    @classmethod
+    def from_sklearn(cls, model):
+        preprocessor = None
+        if hasattr(model, "steps"):  # Pipeline: compile the final forest
+            preprocessor = model[:-1] if len(model.steps) > 1 else None
+            model = model.steps[-1][1]
+
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        n_classes = len(model.classes_)
+        features, thresholds, lefts, values, roots = [], [], [], [], []
+        offset, depth = 0, 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            order, first_child = _sibling_order(tree.children_left, tree.children_right)
+            leaf = tree.children_left[order] == TREE_LEAF
+
+            features.append(np.where(leaf, 0, tree.feature[order]))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold[order]))
+            lefts.append(np.where(leaf, np.arange(len(order)), first_child) + offset)
+
+            proba = tree.value[order, 0, :n_classes].astype(np.float64)
+            totals = proba.sum(axis=1, keepdims=True)
+            if not np.allclose(totals, 1.0):
+                # older sklearn stores class counts; its predict_proba normalises them
+                totals[totals == 0.0] = 1.0
+                proba = proba / totals
+            values.append(proba)
+
+            roots.append(offset)
+            depth = max(depth, tree.max_depth)
+            offset += len(order)
+
+        index_type = np.int32 if offset < 2 ** 31 else np.int64
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=_float32_floor(np.concatenate(thresholds)),
+            left=np.concatenate(lefts).astype(index_type),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=index_type),
+            depth=depth,
+            classes=np.asarray(model.classes_.tolist()),  # object -> plain dtype, so it saves without pickle
+            preprocessor=preprocessor,
+        )
+
+    # -------------------------------
+    # Persist (memory-mappable .npy tables)
+    # -------------------------------
+    def save(self, directory: str, source: dict = None):
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        if self.preprocessor is not None:
+            joblib.dump(self.preprocessor, os.path.join(directory, self.PREPROCESSOR_FILE))
+        with open(os.path.join(directory, self.META_FILE), "w") as f:
+            json.dump({"depth": self.depth, "source": source}, f)
+
+    @classmethod
+    def load(cls, directory: str, source: dict = None, mmap_mode: str = "r"):
+        """
+        Memory-map saved tables, so worker processes share one copy through
+        the page cache.  ``None`` if missing or saved from another ``source``.
+        """
+        meta_path = os.path.join(directory, cls.META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if source is not None and meta.get("source") != source:
+            return None
+
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS}
+        preprocessor_path = os.path.join(directory, cls.PREPROCESSOR_FILE)
+        preprocessor = joblib.load(preprocessor_path) if os.path.exists(preprocessor_path) else None
+
+        return cls(
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            left=arrays["left"],
+            value=arrays["value"],
+            roots=arrays["roots"],
+            depth=meta["depth"],
+            classes=np.asarray(arrays["classes_"]),
+            preprocessor=preprocessor,
+        )
+
+    # -------------------------------
+    # Evaluate
+    # -------------------------------
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index for every (row, tree): shape (n_rows, n_trees)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat = X.ravel()
+        row_start = (np.arange(len(X), dtype=self.left.dtype) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+
+        for _ in range(self.depth):
+            cell = np.take(self.feature, nodes)
+            cell += row_start
+            go_right = np.take(flat, cell) > np.take(self.threshold, nodes)
+            nodes = np.take(self.left, nodes) + go_right
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.preprocessor is not None:
+            X = self.preprocessor.transform(X)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+
+        proba = np.empty((len(X), self.value.shape[1]), dtype=np.float64)
+        for start in range(0, len(X), self.CHUNK_ROWS):
+            leaf_proba = self.value[self.apply(X[start:start + self.CHUNK_ROWS])]  # (rows, trees, classes)
+            # sequential sum in tree order, same rounding as sklearn's accumulation
+            proba[start:start + self.CHUNK_ROWS] = np.cumsum(leaf_proba, axis=1)[:, -1, :]
+        return proba / self.n_estimators
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def _float32_floor(threshold: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each float64 threshold: ``x <= t`` is unchanged for float32 x."""
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def _sibling_order(children_left, children_right):
+    """
+    Breadth-first renumbering of one tree.  Returns ``order`` (new -> old
+    node id) and, per new node, the new id of its left child (the right
+    child is the next id); leaves get -1.
+    """
+    order = [0]
+    first_child = []
+    for old in order:  # grows while we iterate
+        left = children_left[old]
+        if left == TREE_LEAF:
+            first_child.append(-1)
+        else:
+            first_child.append(len(order))
+            order.append(left)
+            order.append(children_right[old])
+    return np.array(order), np.array(first_child)
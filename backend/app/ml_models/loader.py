@@ -1,34 +1,98 @@
 import os
+import shutil
+import threading
 import joblib
+from ..config import settings
+from .compiled_forest import CompiledForest
+from .paths import ARTIFACT_FILES, DEFAULT_ARTIFACTS_DIR
 
-BASE_DIR = os.path.dirname(__file__)
-ARTIFACTS_DIR = os.path.join(BASE_DIR, "artifacts")
-
-# -----------------------------
-# Load Shared Encoders & Scaler
-# -----------------------------
-province_encoder = joblib.load(
-    os.path.join(ARTIFACTS_DIR, "encoders", "province_encoder.pkl")
-)
-
-scaler = joblib.load(
-    os.path.join(ARTIFACTS_DIR, "preprocessors", "scaler.pkl")
-)
-
-# -----------------------------
-# Load Flood Occurrence Model
-# -----------------------------
-rf_flood_model = joblib.load(
-    os.path.join(ARTIFACTS_DIR, "models", "rf_flood_model.pkl")
-)
-
-# -----------------------------
-# Load Flood Severity Model + Label Encoder
-# -----------------------------
-pre_flood_severity_model = joblib.load(
-    os.path.join(ARTIFACTS_DIR, "models", "pre_flood_severity_model.pkl")
-)
-
-pre_flood_severity_label_encoder = joblib.load(
-    os.path.join(ARTIFACTS_DIR, "encoders", "pre_flood_severity_label_encoder.pkl")
-)
+# settings also read .env; the training scripts only see the environment
+ARTIFACTS_DIR = settings.ML_ARTIFACTS_DIR or DEFAULT_ARTIFACTS_DIR
+
+# Forests that ML_ENGINE=compiled swaps for flat, memory-mapped node tables
+FORESTS = ("rf_flood_model", "pre_flood_severity_model")
+
+
+class ArtifactRegistry:
+    """
+    Lazily loaded model artifacts: ``artifacts.rf_flood_model`` unpickles
+    on first access (once, thread-safe), so importing the app -- and workers
+    that only serve SOS or routing -- never pay for the forests.
+
+    With ``ML_ENGINE=compiled`` each forest is compiled once into
+    ``ARTIFACTS_DIR/compiled/<name>/`` (.npy node tables, rebuilt when the
+    source pickle changes) and memory-mapped read-only from there, so every
+    uvicorn worker on the host shares one copy through the page cache.
+    """
+
+    def __init__(self, directory: str, engine: str = "sklearn"):
+        if engine not in ("sklearn", "compiled"):
+            raise ValueError(f"Unknown ML_ENGINE '{engine}'")
+        self.directory = directory
+        self.engine = engine
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._reload_listeners = []
+
+    def __getattr__(self, name):
+        if name not in ARTIFACT_FILES:
+            raise AttributeError(name)
+        return self.get(name)
+
+    def get(self, name: str):
+        artifact = self._loaded.get(name)
+        if artifact is None:
+            with self._lock:
+                artifact = self._loaded.get(name)
+                if artifact is None:
+                    artifact = self._load(name)
+                    self._loaded[name] = artifact
+        return artifact
+
+    def preload(self):
+        for name in ARTIFACT_FILES:
+            self.get(name)
+
+    def loaded(self):
+        return sorted(self._loaded)
+
+    def on_reload(self, callback):
+        """Call ``callback()`` whenever the models are reloaded (e.g. to drop cached outputs)."""
+        self._reload_listeners.append(callback)
+
+    def reload(self):
+        """Forget loaded artifacts; the next access reads them from disk again."""
+        with self._lock:
+            self._loaded = {}
+        for callback in self._reload_listeners:
+            callback()
+
+    def _load(self, name: str):
+        path = os.path.join(self.directory, ARTIFACT_FILES[name])
+        if self.engine == "compiled" and name in FORESTS:
+            return self._load_compiled(name, path)
+        return joblib.load(path)
+
+    def _load_compiled(self, name: str, path: str):
+        stat = os.stat(path)
+        source = {"file": ARTIFACT_FILES[name], "size": stat.st_size, "mtime": stat.st_mtime}
+        compiled_dir = os.path.join(self.directory, "compiled", name)
+
+        forest = CompiledForest.load(compiled_dir, source)
+        if forest is not None:
+            return forest
+
+        # Compile into a private dir and swap it in: workers starting together don't clash
+        compiled = CompiledForest.from_sklearn(joblib.load(path))
+        staging = f"{compiled_dir}.{os.getpid()}.tmp"
+        compiled.save(staging, source)
+        shutil.rmtree(compiled_dir, ignore_errors=True)
+        try:
+            os.replace(staging, compiled_dir)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)  # another worker got there first
+
+        return CompiledForest.load(compiled_dir, source) or compiled
+
+
+artifacts = ArtifactRegistry(ARTIFACTS_DIR, settings.ML_ENGINE)
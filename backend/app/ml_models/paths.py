@@ -0,0 +1,24 @@
+import os
+
+# Plain path constants shared by the app (loader.py) and the offline
+# training scripts -- no app.config import, so training runs without the
+# server's environment (MONGO_URL, SECRET_KEY, ...).
+
+ML_MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACTS_DIR = os.path.join(ML_MODELS_DIR, "artifacts")
+ARTIFACTS_DIR = os.environ.get("ML_ARTIFACTS_DIR") or DEFAULT_ARTIFACTS_DIR
+DATA_PATH = os.path.join(ML_MODELS_DIR, "data", "combined_flood_data.csv")
+
+# -----------------------------
+# Artifact files (relative to ARTIFACTS_DIR)
+# -----------------------------
+ARTIFACT_FILES = {
+    # shared encoders & scaler
+    "province_encoder": os.path.join("encoders", "province_encoder.pkl"),
+    "scaler": os.path.join("preprocessors", "scaler.pkl"),
+    # flood occurrence model
+    "rf_flood_model": os.path.join("models", "rf_flood_model.pkl"),
+    # flood severity model + label encoder
+    "pre_flood_severity_model": os.path.join("models", "pre_flood_severity_model.pkl"),
+    "pre_flood_severity_label_encoder": os.path.join("encoders", "pre_flood_severity_label_encoder.pkl"),
+}
@@ -0,0 +1,226 @@
+"""
+Precomputed flood-risk grid: province x month x rain x temp x veg x ice.
+
+Offline job (run from backend/ with the usual .env):
+
+    python -m app.ml_models.risk_grid --year 2025 --workers 8
+
+evaluates both models over every grid cell -- batched per (province, month)
+slab and spread over worker processes -- and writes memory-mappable .npy
+tensors to ``artifacts/risk_grid/``.  ``RiskGrid.lookup`` then answers a
+risk query with an index lookup (or multilinear interpolation of the flood
+probability) instead of running the forests.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .loader import ARTIFACTS_DIR
+
+RISK_GRID_DIR = os.path.join(ARTIFACTS_DIR, "risk_grid")
+
+# (start, stop, step) per continuous input, sized from combined_flood_data.csv
+DEFAULT_AXES = {
+    "rain_mm": (0.0, 600.0, 50.0),
+    "temp": (-10.0, 50.0, 10.0),
+    "veg": (0.0, 6000.0, 1000.0),
+    "ice": (-0.4, 0.5, 0.15),
+}
+AXIS_ORDER = ("rain_mm", "temp", "veg", "ice")
+MONTHS = 12
+NO_FLOOD = -1  # severity code of cells where no flood is predicted
+
+# the training CSV's file name leaked into the province encoder as a class
+NOT_PROVINCES = {"combined_flood_data"}
+
+
+def axis_values(start: float, stop: float, step: float) -> np.ndarray:
+    return np.round(np.arange(start, stop + step / 2, step), 6)
+
+
+class RiskGrid:
+    """
+    Flood probability (float32) and severity code (int8) for every grid
+    cell, ``NO_FLOOD`` where the flood model says no.
+    """
+
+    FLOOD_FILE = "flood_probability.npy"
+    SEVERITY_FILE = "severity.npy"
+    META_FILE = "risk_grid_meta.json"
+
+    def __init__(self, flood, severity, provinces: List[str], axes: Dict[str, tuple], severity_labels: List[str], meta: dict):
+        self.flood = flood          # (provinces, 12, rain, temp, veg, ice)
+        self.severity = severity    # same shape, NO_FLOOD where flood is not predicted
+        self.provinces = list(provinces)
+        self.province_index = {p: i for i, p in enumerate(self.provinces)}
+        self.axes = {name: tuple(axes[name]) for name in AXIS_ORDER}
+        self.values = {name: axis_values(*self.axes[name]) for name in AXIS_ORDER}
+        self.severity_labels = list(severity_labels)
+        self.meta = meta
+
+    # -------------------------------
+    # Persist
+    # -------------------------------
+    def save(self, directory: str = RISK_GRID_DIR):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, self.FLOOD_FILE), np.ascontiguousarray(self.flood))
+        np.save(os.path.join(directory, self.SEVERITY_FILE), np.ascontiguousarray(self.severity))
+        with open(os.path.join(directory, self.META_FILE), "w") as f:
+            json.dump({
+                **self.meta,
+                "provinces": self.provinces,
+                "axes": self.axes,
+                "severity_labels": self.severity_labels,
+            }, f)
+
+    @classmethod
+    def load(cls, directory: str = RISK_GRID_DIR) -> Optional["RiskGrid"]:
+        """Memory-map a saved grid; ``None`` if it has not been built."""
+        meta_path = os.path.join(directory, cls.META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return cls(
+            np.load(os.path.join(directory, cls.FLOOD_FILE), mmap_mode="r"),
+            np.load(os.path.join(directory, cls.SEVERITY_FILE), mmap_mode="r"),
+            meta.pop("provinces"), meta.pop("axes"), meta.pop("severity_labels"), meta
+        )
+
+    # -------------------------------
+    # Query
+    # -------------------------------
+    def lookup(self, province: str, month: int, rain_mm: float, temp: float, veg: float, ice: float,
+               interpolate: bool = False) -> Optional[dict]:
+        p = self.province_index.get(province.strip().title())
+        if p is None:
+            return None
+
+        inputs = {"rain_mm": rain_mm, "temp": temp, "veg": veg, "ice": ice}
+        slab = self.flood[p, month - 1]
+
+        # fractional position along every axis, clamped to the grid
+        position = []
+        for name in AXIS_ORDER:
+            start, _, step = self.axes[name]
+            last = len(self.values[name]) - 1
+            position.append(min(max((inputs[name] - start) / step, 0.0), last))
+
+        # the flood / severity class is the nearest cell's; interpolation only smooths the probability
+        nearest = tuple(int(round(x)) for x in position)
+        probability = _multilinear(slab, position) if interpolate else float(slab[nearest])
+
+        code = int(self.severity[p, month - 1][nearest])
+        flood = code != NO_FLOOD
+        severity = self.severity_labels[code] if flood else "No Flood"
+
+        return {
+            "province": self.provinces[p],
+            "month": month,
+            "flood": flood,
+            "flood_probability": round(probability, 4),
+            "severity": severity,
+            "cell": {name: float(self.values[name][i]) for name, i in zip(AXIS_ORDER, nearest)},
+            "year": self.meta.get("year"),
+        }
+
+
+def _multilinear(slab, position) -> float:
+    """Interpolate ``slab`` (4-D) at fractional ``position``: 16 corner reads."""
+    lower = [int(np.floor(x)) for x in position]
+    upper = [min(l + 1, n - 1) for l, n in zip(lower, slab.shape)]
+    weight = [x - l for x, l in zip(position, lower)]
+
+    total = 0.0
+    for corner in range(16):
+        index, w = [], 1.0
+        for axis in range(4):
+            high = (corner >> axis) & 1
+            index.append(upper[axis] if high else lower[axis])
+            w *= weight[axis] if high else 1.0 - weight[axis]
+        if w:
+            total += w * float(slab[tuple(index)])
+    return total
+
+
+# =========================================================
+# Offline build
+# =========================================================
+def _evaluate_slab(task):
+    """Worker: both models over one (province, month) slab of the grid."""
+    from ..models.prediction import FloodPredictionInput
+    from ..services.ml_service import prediction_service
+    from .loader import artifacts
+
+    province, month, year, axes = task
+    mesh = np.meshgrid(*(axis_values(*axes[name]) for name in AXIS_ORDER), indexing="ij")
+    cells = np.stack([m.ravel() for m in mesh], axis=1)
+
+    rows = [
+        FloodPredictionInput.model_construct(
+            month=month, year=year, province=province,
+            rain_mm=float(rain), temp=float(temp), veg=float(veg), ice=float(ice)
+        )
+        for rain, temp, veg, ice in cells
+    ]
+
+    model = artifacts.rf_flood_model
+    proba = model.predict_proba(prediction_service.prepare_features_batch(rows))
+    flood_probability = proba[:, list(model.classes_).index(1)]
+
+    # same decision as the live endpoint: the argmax class
+    severity = np.full(len(rows), NO_FLOOD, dtype=np.int8)
+    flooded = np.flatnonzero(model.classes_[proba.argmax(axis=1)] == 1)
+    if len(flooded):
+        severity[flooded] = artifacts.pre_flood_severity_model.predict(
+            prediction_service.severity_features([rows[i] for i in flooded])
+        )
+
+    shape = mesh[0].shape
+    return flood_probability.astype(np.float32).reshape(shape), severity.reshape(shape)
+
+
+def build_risk_grid(year: int, axes: Dict[str, tuple] = None, provinces: List[str] = None,
+                    workers: int = None) -> RiskGrid:
+    from .loader import artifacts
+
+    axes = {**DEFAULT_AXES, **(axes or {})}
+    if provinces is None:
+        provinces = [p for p in artifacts.province_encoder.classes_ if p not in NOT_PROVINCES]
+    severity_labels = [str(label) for label in artifacts.pre_flood_severity_label_encoder.classes_]
+
+    tasks = [(province, month, year, axes) for province in provinces for month in range(1, MONTHS + 1)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        slabs = list(pool.map(_evaluate_slab, tasks))
+
+    shape = (len(provinces), MONTHS) + slabs[0][0].shape
+    flood = np.stack([s[0] for s in slabs]).reshape(shape)
+    severity = np.stack([s[1] for s in slabs]).reshape(shape)
+
+    return RiskGrid(flood, severity, provinces, axes, severity_labels, {"year": year, "created": time.time()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the province x month flood-risk grid")
+    parser.add_argument("--year", type=int, default=time.localtime().tm_year)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default=RISK_GRID_DIR)
+    for name in AXIS_ORDER:
+        parser.add_argument(f"--{name.replace('_', '-')}", nargs=3, type=float, metavar=("START", "STOP", "STEP"),
+                            default=DEFAULT_AXES[name])
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    grid = build_risk_grid(args.year, {name: tuple(getattr(args, name)) for name in AXIS_ORDER}, workers=args.workers)
+    grid.save(args.out)
+    print(f"✅ Risk grid {grid.flood.shape} ({grid.flood.size:,} cells) built in {time.perf_counter() - started:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
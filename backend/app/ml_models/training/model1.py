@@ -1,3 +1,5 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score
@@ -12,10 +14,15 @@ import joblib
 import warnings
 warnings.filterwarnings('ignore')
 
+# make `app` importable when run as a plain script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from app.ml_models.paths import ARTIFACT_FILES, ARTIFACTS_DIR, DATA_PATH  # noqa: E402
+from app.utils.feature_engineering import FLOOD_FEATURES, FLOOD_NUM_COLUMNS  # noqa: E402
+
 # ----------------------------
 # 1. Load cleaned dataset
 # ----------------------------
-df = pd.read_csv(r"D:\project\Minarah\backend\app\ml_models\data\combined_flood_data.csv")
+df = pd.read_csv(DATA_PATH)
 
 print(f"Dataset shape: {df.shape}")
 print(f"Flood class distribution:\n{df['Flood'].value_counts()}")
@@ -34,7 +41,7 @@ print(f"\nProvince Encoding: {province_mapping}")
 # ----------------------------
 # 3. Define features and target
 # ----------------------------
-features = ['Month', 'Year', 'Temp', 'Ice', 'Veg', 'Rain_mm', 'Province_enc']
+features = FLOOD_FEATURES  # the column order the API serves
 X = df[features].copy()
 y = df['Flood'].copy()
 
@@ -45,18 +52,18 @@ X = X.fillna(X.median())
 # 4. Load shared scaler
 # ----------------------------
 try:
-    scaler = joblib.load(r"D:\project\Minarah\backend\app\ml_models\artifacts\preprocessors\scaler.pkl")
+    scaler = joblib.load(os.path.join(ARTIFACTS_DIR, ARTIFACT_FILES["scaler"]))
     print("\nScaler loaded successfully")
 except FileNotFoundError:
     print("\nWarning: Scaler not found. Consider creating one if this is first run.")
     from sklearn.preprocessing import StandardScaler
     scaler = StandardScaler()
     # Fit on all numerical columns
-    num_cols = ['Year', 'Temp', 'Ice', 'Veg', 'Rain_mm']
+    num_cols = FLOOD_NUM_COLUMNS
     scaler.fit(df[num_cols])
     joblib.dump(scaler, "scaler.pkl")
 
-num_cols = ['Year', 'Temp', 'Ice', 'Veg', 'Rain_mm']
+num_cols = FLOOD_NUM_COLUMNS
 X[num_cols] = scaler.transform(X[num_cols])
 
 # ----------------------------
@@ -95,6 +102,7 @@ rf_model = RandomForestClassifier(
 )
 
 # Cross-validation on resampled data
+# (for a parallel, cached search with per-fold resampling: python -m app.ml_models.training.train flood)
 cv_scores = cross_val_score(rf_model, X_res, y_res, cv=5, scoring='roc_auc')
 print(f"Cross-validation ROC-AUC scores: {cv_scores}")
 print(f"Mean CV ROC-AUC: {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
@@ -214,7 +222,7 @@ sample_extreme = pd.DataFrame({
     'Veg': [50],            # low vegetation
     'Rain_mm': [900],       # extreme rainfall
     'Province_enc': [le.transform(['Punjab'])[0]]
-})
+})[features]
 
 sample_extreme[num_cols] = scaler.transform(sample_extreme[num_cols])
 pred_proba_high = rf_model.predict_proba(sample_extreme)[:,1]
@@ -232,7 +240,7 @@ sample_low = pd.DataFrame({
     'Veg': [80],            # good vegetation
     'Rain_mm': [50],        # low rainfall
     'Province_enc': [le.transform(['Punjab'])[0]]
-})
+})[features]
 
 sample_low[num_cols] = scaler.transform(sample_low[num_cols])
 pred_proba_low = rf_model.predict_proba(sample_low)[:,1]
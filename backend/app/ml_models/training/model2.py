@@ -1,3 +1,5 @@
+import os
+import sys
 import pandas as pd
 import joblib
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
@@ -13,10 +15,15 @@ import seaborn as sns
 import warnings
 warnings.filterwarnings('ignore')
 
+# make `app` importable when run as a plain script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from app.utils.feature_engineering import assign_severity, severity_score  # noqa: E402
+from app.ml_models.paths import ARTIFACT_FILES, ARTIFACTS_DIR, DATA_PATH  # noqa: E402
+
 # -----------------------------
 # LOAD DATA
 # -----------------------------
-df = pd.read_csv(r"D:\project\Minarah\backend\app\ml_models\data\combined_flood_data.csv")
+df = pd.read_csv(DATA_PATH)
 
 print(f"Dataset shape: {df.shape}")
 print(f"\nFirst few rows:")
@@ -31,59 +38,9 @@ print(df[['Rain_mm', 'Temp', 'Veg', 'Ice']].describe())
 pre_flood_features = ['Rain_mm', 'Temp', 'Veg', 'Ice']
 
 # -----------------------------
-# IMPROVED SEVERITY FORMULA
+# SEVERITY FORMULA (vectorised, shared with the API: utils/feature_engineering.py)
 # -----------------------------
-def assign_severity_formula(row):
-    """
-    Assign flood severity based on environmental indicators.
-    
-    Formula explanation:
-    - Rain: Primary driver (50% weight) - normalized by 500mm
-    - Vegetation: Protective factor (30% weight) - higher veg = lower score
-    - Temperature: Secondary factor (15% weight) - affects evaporation
-    - Ice: Protective/risk factor (5% weight) - can indicate snowmelt
-    
-    Thresholds:
-    - Severe: score >= 0.6 (immediate flood risk)
-    - Moderate: 0.3 <= score < 0.6 (elevated risk)
-    - Low: score < 0.3 (normal conditions)
-    """
-    # Handle missing values
-    rain = row.get('Rain_mm', 0)
-    veg = row.get('Veg', 0)
-    temp = row.get('Temp', 0)
-    ice = row.get('Ice', 0)
-    
-    # Normalize each factor to 0-1 range
-    # Rain: Higher rain = higher risk
-    rain_norm = min(rain / 500, 1.0)  # Cap at 1.0 for extreme values
-    
-    # Vegetation: INVERSE relationship (higher veg = lower risk)
-    # Changed formula to reflect this
-    veg_norm = max(0, 1 - (veg / 5000))  # Inverted
-    
-    # Temperature: Higher temp = higher evaporation, but also more intense weather
-    temp_norm = min(temp / 50, 1.0)
-    
-    # Ice: Negative ice or low ice could indicate snowmelt risk
-    ice_norm = max(0, (10 - ice) / 10)  # Inverted: less ice = higher risk
-    
-    # Weighted score
-    score = (0.50 * rain_norm + 
-             0.30 * veg_norm + 
-             0.15 * temp_norm + 
-             0.05 * ice_norm)
-    
-    # Assign severity categories
-    if score >= 0.45:
-        return "Severe"
-    elif score >= 0.25:
-        return "Moderate"
-    else:
-        return "Low"
-
-# Apply severity formula
-df['Severity'] = df.apply(assign_severity_formula, axis=1)
+df['Severity'] = assign_severity(df)
 
 print(f"\n--- SEVERITY DISTRIBUTION ---")
 print(df['Severity'].value_counts())
@@ -126,7 +83,7 @@ print(f"Training severity distribution:\n{pd.Series(y_train).value_counts()}")
 # LOAD OR CREATE SHARED SCALER
 # -----------------------------
 try:
-    shared_scaler = joblib.load(r"D:\project\Minarah\backend\app\ml_models\artifacts\preprocessors\scaler.pkl")
+    shared_scaler = joblib.load(os.path.join(ARTIFACTS_DIR, ARTIFACT_FILES["scaler"]))
     print("\n✓ Shared scaler loaded successfully")
 except FileNotFoundError:
     print("\n⚠️ Shared scaler not found. Creating new StandardScaler.")
@@ -157,6 +114,7 @@ preprocessor = ColumnTransformer(
 # -----------------------------
 print("\n--- MODEL TRAINING ---")
 use_grid_search = False  # Set to True for hyperparameter tuning
+# (for a parallel, cached search: python -m app.ml_models.training.train severity)
 
 if use_grid_search:
     print("Running GridSearchCV for hyperparameter tuning...")
@@ -341,13 +299,8 @@ for scenario in test_scenarios:
     pred_label = le.inverse_transform([pred])[0]
     proba = model.predict_proba(sample)[0]
     
-    # Calculate manual score for transparency
-    row = sample.iloc[0]
-    rain_norm = min(row['Rain_mm'] / 500, 1.0)
-    veg_norm = max(0, 1 - (row['Veg'] / 5000))
-    temp_norm = min(row['Temp'] / 50, 1.0)
-    ice_norm = max(0, (10 - row['Ice']) / 10)
-    manual_score = 0.50*rain_norm + 0.30*veg_norm + 0.15*temp_norm + 0.05*ice_norm
+    # Formula score for transparency
+    manual_score = severity_score(sample).iloc[0]
     
     print(f"Input: {scenario['data']}")
     print(f"Manual Risk Score: {manual_score:.4f}")
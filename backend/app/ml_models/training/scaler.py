@@ -1,12 +1,19 @@
+import os
+import sys
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 import joblib
 
+# make `app` importable when run as a plain script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from app.ml_models.paths import DATA_PATH  # noqa: E402
+from app.utils.feature_engineering import FLOOD_NUM_COLUMNS  # noqa: E402
+
 # Load dataset
-df = pd.read_csv(r"D:\project\Minarah\backend\app\ml_models\combined_flood_data.csv")
+df = pd.read_csv(DATA_PATH)
 
 # Numeric features to scale
-num_cols = ['Year', 'Temp', 'Ice', 'Veg', 'Rain_mm']
+num_cols = FLOOD_NUM_COLUMNS
 
 # Fill missing values
 df[num_cols] = df[num_cols].fillna(df[num_cols].mean())
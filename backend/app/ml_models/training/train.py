@@ -0,0 +1,286 @@
+"""
+Hyperparameter search driver for the flood and severity forests.
+
+Run from backend/ (all paths default to the repo layout):
+
+    python -m app.ml_models.training.train flood --search halving --jobs 4 --memory-mb 4096
+    python -m app.ml_models.training.train severity --search random --n-iter 30 --save
+
+* Resampling (SMOTE-Tomek) and preprocessing run as pipeline steps inside
+  each CV fold, and the pipeline is given a ``joblib.Memory`` cache: the
+  resampled / transformed fold is computed once per fold and reused by
+  every candidate and every later run with the same data.
+* ``halving`` (default) is successive halving over the number of trees --
+  many candidates on small forests, only the best few grown to the full
+  size; ``random`` is a plain randomized search.
+* Candidates are evaluated in parallel; ``--memory-mb`` caps the number of
+  workers so the forests being fitted at once fit in the budget.
+
+Timings, the best CV score / parameters and the held-out test score are
+printed and written to ``<cache-dir>/<model>_search_report.json``.
+"""
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from imblearn.combine import SMOTETomek
+from imblearn.pipeline import Pipeline as ImbPipeline
+from scipy.stats import randint
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.model_selection import HalvingRandomSearchCV, RandomizedSearchCV, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from ...utils.feature_engineering import FLOOD_FEATURES, FLOOD_NUM_COLUMNS, assign_severity
+from ..paths import ARTIFACT_FILES, ARTIFACTS_DIR, DATA_PATH, ML_MODELS_DIR
+
+CACHE_DIR = os.path.join(ML_MODELS_DIR, "training", ".cache")
+
+SEVERITY_FEATURES = ['Rain_mm', 'Temp', 'Veg', 'Ice']
+
+# Search spaces; n_estimators is the halving resource (or sampled under --search random)
+PARAM_SPACES = {
+    "flood": {
+        "clf__max_depth": [6, 8, 10, 12, 16, None],
+        "clf__min_samples_split": randint(2, 11),
+        "clf__min_samples_leaf": randint(1, 5),
+        "clf__max_features": ["sqrt", "log2", 0.5],
+    },
+    "severity": {
+        "clf__max_depth": [6, 8, 10, 12, 16, None],
+        "clf__min_samples_split": randint(2, 11),
+        "clf__min_samples_leaf": randint(1, 5),
+        "clf__max_features": ["sqrt", 0.5, None],
+    },
+}
+SCORING = {"flood": "roc_auc", "severity": "f1_weighted"}
+
+
+# =========================================================
+# Data
+# =========================================================
+def load_flood_data(data_path: str, artifacts_dir: str):
+    """Features / target as model1.py builds them (shared scaler, median fill)."""
+    df = pd.read_csv(data_path)
+
+    province_encoder = LabelEncoder()
+    df['Province_enc'] = province_encoder.fit_transform(df['Province'].astype(str))
+
+    X = df[FLOOD_FEATURES].copy()
+    X = X.fillna(X.median())
+
+    scaler_path = os.path.join(artifacts_dir, ARTIFACT_FILES["scaler"])
+    if os.path.exists(scaler_path):
+        scaler = joblib.load(scaler_path)
+    else:
+        print(f"⚠️ Shared scaler not found at {scaler_path}; fitting a new one")
+        scaler = StandardScaler().fit(df[FLOOD_NUM_COLUMNS])
+    X[FLOOD_NUM_COLUMNS] = scaler.transform(X[FLOOD_NUM_COLUMNS])
+
+    return X, df['Flood'].copy(), {"province_encoder": province_encoder, "scaler": scaler}
+
+
+def load_severity_data(data_path: str):
+    """Pre-flood readings labelled with the shared severity formula (model2.py)."""
+    df = pd.read_csv(data_path)
+
+    label_encoder = LabelEncoder()
+    y = pd.Series(label_encoder.fit_transform(assign_severity(df)), index=df.index)
+
+    return df[SEVERITY_FEATURES].copy(), y, {"pre_flood_severity_label_encoder": label_encoder}
+
+
+# =========================================================
+# Pipelines
+# =========================================================
+def flood_pipeline(memory, seed: int):
+    # resampling is a fit-only step: validation folds are scored on real rows
+    return ImbPipeline([
+        ("resample", SMOTETomek(sampling_strategy=0.5, random_state=seed)),
+        ("clf", RandomForestClassifier(class_weight="balanced", random_state=seed, n_jobs=1)),
+    ], memory=memory)
+
+
+def severity_pipeline(memory, seed: int):
+    preprocessor = ColumnTransformer([
+        ("num", Pipeline([
+            ("imputer", SimpleImputer(strategy="mean")),
+            ("scaler", StandardScaler()),
+        ]), SEVERITY_FEATURES)
+    ], remainder="passthrough")
+
+    return Pipeline([
+        ("preprocessor", preprocessor),
+        ("clf", RandomForestClassifier(class_weight="balanced", random_state=seed, n_jobs=1)),
+    ], memory=memory)
+
+
+def estimate_fit_mb(n_samples: int, n_features: int, n_classes: int, max_trees: int) -> float:
+    """
+    Rough peak memory of one worker fitting the largest candidate: its
+    copy of the fold plus every tree grown to the worst case of one leaf
+    per two samples (node struct ~64 bytes + class values).
+    """
+    data = n_samples * n_features * 8 * 3  # fold, resampled fold, float32 copy for the trees
+    nodes_per_tree = 2 * n_samples
+    forest = max_trees * nodes_per_tree * (64 + 8 * n_classes)
+    return (data + forest) / 2 ** 20
+
+
+def workers_for_budget(jobs: int, memory_mb: float, per_worker_mb: float) -> int:
+    jobs = os.cpu_count() if jobs in (None, -1) else jobs
+    if memory_mb:
+        jobs = min(jobs, int(memory_mb // max(per_worker_mb, 1.0)))
+    return max(1, jobs)
+
+
+# =========================================================
+# Search
+# =========================================================
+def run_search(model: str, data_path: str = DATA_PATH, artifacts_dir: str = ARTIFACTS_DIR,
+               cache_dir: str = CACHE_DIR, search: str = "halving", n_iter: int = 24,
+               min_trees: int = 50, max_trees: int = 500, folds: int = 5, jobs: int = -1,
+               memory_mb: float = None, seed: int = 42, verbose: int = 1):
+    timings = {}
+    started = time.perf_counter()
+
+    if model == "flood":
+        X, y, extras = load_flood_data(data_path, artifacts_dir)
+    elif model == "severity":
+        X, y, extras = load_severity_data(data_path)
+    else:
+        raise ValueError(f"Unknown model '{model}'")
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+    timings["load_s"] = time.perf_counter() - started
+
+    memory = joblib.Memory(os.path.join(cache_dir, model), verbose=0)
+    pipeline = (flood_pipeline if model == "flood" else severity_pipeline)(memory, seed)
+
+    per_worker_mb = estimate_fit_mb(len(X_train), X_train.shape[1], y.nunique(), max_trees)
+    n_jobs = workers_for_budget(jobs, memory_mb, per_worker_mb)
+
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    common = dict(scoring=SCORING[model], cv=cv, n_jobs=n_jobs,
+                  random_state=seed, verbose=verbose, refit=True)
+
+    if search == "halving":
+        searcher = HalvingRandomSearchCV(
+            pipeline, PARAM_SPACES[model], n_candidates=n_iter, factor=3,
+            resource="clf__n_estimators", min_resources=min_trees, max_resources=max_trees,
+            **common
+        )
+    elif search == "random":
+        space = {**PARAM_SPACES[model], "clf__n_estimators": randint(min_trees, max_trees + 1)}
+        # dispatch only as many fits as there are workers: bounded peak memory
+        searcher = RandomizedSearchCV(pipeline, space, n_iter=n_iter, pre_dispatch="n_jobs", **common)
+    else:
+        raise ValueError(f"Unknown search '{search}'")
+
+    print(f"🔎 {search} search for the {model} model: {n_iter} candidates, {folds}-fold CV, "
+          f"{n_jobs} worker(s) (~{per_worker_mb:.0f} MB each), cache {memory.location}")
+
+    fit_started = time.perf_counter()
+    searcher.fit(X_train, y_train)
+    timings["search_s"] = time.perf_counter() - fit_started
+
+    best = searcher.best_estimator_
+    if model == "flood":
+        test_score = roc_auc_score(y_test, best.predict_proba(X_test)[:, 1])
+    else:
+        test_score = f1_score(y_test, best.predict(X_test), average="weighted")
+    timings["total_s"] = time.perf_counter() - started
+
+    results = pd.DataFrame(searcher.cv_results_)
+    report = {
+        "model": model,
+        "search": search,
+        "scoring": SCORING[model],
+        "best_params": {k: _jsonable(v) for k, v in searcher.best_params_.items()},
+        "best_cv_score": float(searcher.best_score_),
+        "test_score": float(test_score),
+        "candidates_fitted": int(len(results)),
+        "n_jobs": n_jobs,
+        "timings": {k: round(v, 2) for k, v in timings.items()},
+        "mean_fit_s_per_candidate": round(float(results["mean_fit_time"].mean()), 3),
+    }
+    if search == "halving":
+        report["rounds"] = [
+            {"round": int(i), "trees": int(n), "candidates": int(c)}
+            for i, (n, c) in enumerate(zip(searcher.n_resources_, searcher.n_candidates_))
+        ]
+
+    return searcher, extras, report
+
+
+def save_artifacts(model: str, searcher, extras: dict, artifacts_dir: str):
+    """Write the refitted best model (and its encoders) where the API loads them."""
+    if model == "flood":
+        # the API prepares features itself (in FLOOD_FEATURES order); it serves the bare forest
+        forest = searcher.best_estimator_.named_steps["clf"]
+        columns = list(getattr(forest, "feature_names_in_", searcher.best_estimator_.feature_names_in_))
+        assert columns == FLOOD_FEATURES, f"flood forest fitted on {columns}, the API serves {FLOOD_FEATURES}"
+        fitted = {"rf_flood_model": forest, **extras}
+    else:
+        # drop the cache handle so the pickle does not point at this machine's cache dir
+        fitted = {"pre_flood_severity_model": searcher.best_estimator_.set_params(memory=None), **extras}
+
+    for name, obj in fitted.items():
+        path = os.path.join(artifacts_dir, ARTIFACT_FILES[name])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(obj, path)
+        print(f"💾 {name} -> {path}")
+
+
+def _jsonable(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter search for the flood / severity forests")
+    parser.add_argument("model", choices=("flood", "severity"))
+    parser.add_argument("--data", default=DATA_PATH, help="training CSV")
+    parser.add_argument("--artifacts-dir", default=ARTIFACTS_DIR, help="shared scaler source and --save target")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="joblib cache of preprocessed / resampled folds")
+    parser.add_argument("--search", choices=("halving", "random"), default="halving")
+    parser.add_argument("--n-iter", type=int, default=24, help="candidates sampled")
+    parser.add_argument("--min-trees", type=int, default=50)
+    parser.add_argument("--max-trees", type=int, default=500)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel workers (default: all cores)")
+    parser.add_argument("--memory-mb", type=float, default=None, help="cap workers to fit this budget")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", action="store_true", help="write the best model into --artifacts-dir")
+    args = parser.parse_args()
+
+    searcher, extras, report = run_search(
+        args.model, args.data, args.artifacts_dir, args.cache_dir, args.search, args.n_iter,
+        args.min_trees, args.max_trees, args.folds, args.jobs, args.memory_mb, args.seed
+    )
+
+    print("\n" + "=" * 60)
+    print(f"Best CV {report['scoring']}: {report['best_cv_score']:.4f}   held-out test: {report['test_score']:.4f}")
+    print(f"Best parameters: {report['best_params']}")
+    print(f"{report['candidates_fitted']} candidate fits, timings: {report['timings']}")
+    print("=" * 60)
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    report_path = os.path.join(args.cache_dir, f"{args.model}_search_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Report -> {report_path}")
+
+    if args.save:
+        save_artifacts(args.model, searcher, extras, args.artifacts_dir)
+
+
+if __name__ == "__main__":
+    main()
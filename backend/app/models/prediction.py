@@ -1,3 +1,4 @@
+from typing import List
 from pydantic import BaseModel, Field, validator
 
 class FloodPredictionInput(BaseModel):
@@ -16,3 +17,11 @@ class FloodPredictionInput(BaseModel):
 class FloodPredictionOutput(BaseModel):
     flood: bool = Field(..., description="Flood prediction True/False")
     severity: str = Field(..., description="Level of severity")
+
+
+class FloodBatchInput(BaseModel):
+    rows: List[FloodPredictionInput] = Field(..., min_length=1, max_length=10000, description="Forecast rows")
+
+class FloodBatchOutput(BaseModel):
+    count: int = Field(..., description="Number of rows predicted")
+    results: List[FloodPredictionOutput] = Field(..., description="Predictions, in input order")
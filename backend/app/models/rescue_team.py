@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 
 class RescueTeamCreate(BaseModel):
@@ -9,6 +9,10 @@ class RescueTeamCreate(BaseModel):
     area: str
     phone: str
     availability: str = "Available"  # Available | Busy | Offline
+    node_id: Optional[str] = None  # road-graph node of the team base, used for dispatch routing
+    # Base position; stored as a GeoJSON point (``geo``), updated via PUT /location
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
 
 class RescueTeamDB(RescueTeamCreate):
     id: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 class RoadNode(BaseModel):
     id: str
@@ -11,4 +11,35 @@ class RouteResponse(BaseModel):
     path: List[str] = Field(..., description="Ordered list of road/point IDs")
     distance: float = Field(..., description="Total distance in KM")
     status: str = "OK"
-                
\ No newline at end of file
+
+class EdgeRef(BaseModel):
+    source: str = Field(..., description="Road-node ID the closed road leaves from")
+    target: str = Field(..., description="Road-node ID the closed road leads to")
+
+class ClosureSet(BaseModel):
+    nodes: List[str] = Field([], description="Flooded road-node IDs")
+    edges: List[EdgeRef] = Field([], description="Flooded directed roads (close both directions for two-way roads)")
+
+class RouteRequest(BaseModel):
+    start_id: str = Field(..., description="Start node MongoDB ID")
+    end_id: str = Field(..., description="End node MongoDB ID")
+    flooded: List[str] = Field([], description="Flooded road-node IDs")
+    closed_edges: List[EdgeRef] = Field([], description="Flooded directed roads")
+    closure_set: Optional[str] = Field(None, description="Name of a stored closure set to apply")
+
+class CoordRouteRequest(BaseModel):
+    start_lat: float = Field(..., ge=-90, le=90)
+    start_lng: float = Field(..., ge=-180, le=180)
+    end_lat: float = Field(..., ge=-90, le=90)
+    end_lng: float = Field(..., ge=-180, le=180)
+    max_snap_km: float = Field(5.0, gt=0, description="Furthest a point may be from its road node")
+    flooded: List[str] = Field([], description="Flooded road-node IDs")
+    closed_edges: List[EdgeRef] = Field([], description="Flooded directed roads")
+    closure_set: Optional[str] = Field(None, description="Name of a stored closure set to apply")
+
+class MatrixRequest(BaseModel):
+    sources: List[str] = Field(..., description="Origin road-node IDs (e.g. rescue teams)")
+    targets: List[str] = Field(..., description="Destination road-node IDs (e.g. SOS calls)")
+    flooded: List[str] = Field([], description="Flooded road-node IDs")
+    closed_edges: List[EdgeRef] = Field([], description="Flooded directed roads")
+    closure_set: Optional[str] = Field(None, description="Name of a stored closure set to apply")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 class SOSCreate(BaseModel):
@@ -11,6 +11,10 @@ class SOSCreate(BaseModel):
     priority: str  # High / Medium / Low
     status: str = "Pending"
     rescue_team: Optional[str] = None
+    node_id: Optional[str] = None  # nearest road-graph node, used for dispatch routing
+    # GPS position; stored as a GeoJSON point (``geo``) for nearby queries
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
 
 class SOSDB(SOSCreate):
     id: str | None = None
@@ -1,9 +1,70 @@
-from fastapi import APIRouter
-from ..services.ml_service import prediction_service
-from ..models.prediction import FloodPredictionInput, FloodPredictionOutput
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from ..services.ml_service import prediction_service, EXPORT_COLUMNS
+from ..utils.streaming import export_response
+from ..utils.feature_engineering import explain_severity
+from ..models.prediction import FloodPredictionInput, FloodPredictionOutput, FloodBatchInput, FloodBatchOutput
 
 router = APIRouter(prefix="/flood", tags=["Flood"])
 
 @router.post("/predict", response_model=FloodPredictionOutput)
-def flood_prediction(data: FloodPredictionInput):
-    return prediction_service.predict_flood_and_severity(data)
+async def flood_prediction(data: FloodPredictionInput):
+    return await prediction_service.predict_flood_and_severity(data)
+
+@router.post("/predict/batch", response_model=FloodBatchOutput)
+async def flood_prediction_batch(data: FloodBatchInput):
+    try:
+        results = await prediction_service.predict_batch(data.rows)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FloodBatchOutput(count=len(results), results=results)
+
+@router.get("/risk")
+def flood_risk(
+    province: str,
+    month: int = Query(..., ge=1, le=12),
+    rain_mm: float = Query(...),
+    temp: float = Query(...),
+    veg: float = Query(...),
+    ice: float = Query(...),
+    interpolate: bool = Query(False, description="Interpolate the probability between grid cells")
+):
+    # Answered from the precomputed grid: no model evaluation
+    try:
+        grid = prediction_service.risk_grid()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    result = grid.lookup(province, month, rain_mm, temp, veg, ice, interpolate)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Province '{province}' not in risk grid")
+    return result
+
+@router.get("/severity/explain")
+def severity_explain(rain_mm: float, temp: float, veg: float, ice: float):
+    # The labelling formula the severity model was trained on, term by term
+    return explain_severity(rain_mm, temp, veg, ice)
+
+# Prediction log for post-event analysis, streamed as it is read
+@router.get("/predictions/export")
+async def export_predictions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Compress on the fly (.gz download)"),
+    since: Optional[datetime] = Query(None, description="Created at or after (UTC if no offset)"),
+    until: Optional[datetime] = Query(None, description="Created before (UTC if no offset)"),
+    province: Optional[str] = None
+):
+    docs = prediction_service.export(since, until, province)
+    return export_response(docs, format, EXPORT_COLUMNS, "prediction_export", gzip)
+
+# async like /predict: the prediction cache is loop-confined, so these must
+# not read or clear it from a threadpool thread
+@router.get("/predict/metrics")
+async def flood_prediction_metrics():
+    return prediction_service.metrics()
+
+@router.post("/reload")
+async def reload_models():
+    prediction_service.reload_models()
+    return {"message": "Models will be reloaded on next prediction"}
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
 from ..models.rescue_team import RescueTeamCreate
 from ..services.rescue_team_service import rescue_team_service
+from ..utils.streaming import stream_json_array
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/rescue", tags=["Rescue Teams"])
 
 @router.post("/register")
-def register_team(team: RescueTeamCreate):
+async def register_team(team: RescueTeamCreate):
     try:
-        return rescue_team_service.register_team(team)
+        return await rescue_team_service.register_team(team)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -17,20 +19,54 @@ class RescueLoginData(BaseModel):
     password: str
 
 @router.post("/login")
-def rescue_login(data: RescueLoginData):
+async def rescue_login(data: RescueLoginData):
     try:
-        return rescue_team_service.login(data.email, data.password)
+        return await rescue_team_service.login(data.email, data.password)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# List endpoints: keyset pages of UI fields (never the password hash), streamed.
+# Pass the X-Next-Cursor header of a page as ``after`` to get the next one.
+PAGE_LIMIT = 1000
+
+async def _team_list(available_only, after, limit):
+    try:
+        docs, next_cursor = await rescue_team_service.list_teams(available_only, after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream_json_array(docs, next_cursor)
+
 @router.get("/available")
-def available_teams():
-    return rescue_team_service.get_available()
+async def available_teams(
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_LIMIT, description="Page size; all (streamed) when omitted")
+):
+    return await _team_list(True, after, limit)
 
 @router.put("/status/{team_id}")
-def change_status(team_id: str, status: str):
-    return rescue_team_service.update_status(team_id, status)
+async def change_status(team_id: str, status: str):
+    return await rescue_team_service.update_status(team_id, status)
+
+@router.put("/location/{team_id}")
+async def change_location(team_id: str, lat: float = Query(..., ge=-90, le=90), lng: float = Query(..., ge=-180, le=180)):
+    try:
+        return await rescue_team_service.update_location(team_id, lat, lng)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+# Closest teams to an emergency: 2dsphere index (or the in-memory KD-tree)
+@router.get("/nearest")
+async def nearest_teams(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=PAGE_LIMIT),
+    available_only: bool = True
+):
+    return await rescue_team_service.nearest_teams(lat, lng, k, available_only)
 
 @router.get("/allTeams")
-def get_all_teams():
-    return rescue_team_service.get_all_teams()
\ No newline at end of file
+async def get_all_teams(
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_LIMIT, description="Page size; all (streamed) when omitted")
+):
+    return await _team_list(False, after, limit)
\ No newline at end of file
@@ -1,33 +1,37 @@
+from typing import Optional
 from fastapi import APIRouter, Query, HTTPException
+from ..models.route import ClosureSet, CoordRouteRequest, MatrixRequest, RouteRequest
 from ..services.routing_service import routing_service
 
 router = APIRouter(prefix="/route", tags=["Routing"])
 
-@router.get("/find")
-def get_route(
-    start_id: str = Query(..., description="Start node MongoDB ID"),
-    end_id: str = Query(..., description="End node MongoDB ID"),
-    flooded: str = Query("", description="Comma-separated list of flooded road-node IDs")
-):
-    # Split flooded IDs
-    flooded_roads = [f.strip() for f in flooded.split(",") if f.strip()]
 
+async def _named_closure_set(name: Optional[str]):
+    if not name:
+        return None
+
+    closure_set = await routing_service.get_closure_set(name)
+    if not closure_set:
+        raise HTTPException(status_code=404, detail=f"Closure set '{name}' not found.")
+    return closure_set
+
+
+async def _route(start_id, end_id, closures):
     # Ensure DB graph connected
     if routing_service.graph is None:
         raise HTTPException(status_code=500, detail="Routing graph not initialized in backend.")
 
-    # Fetch nodes
-    start = routing_service.graph.find_one({"_id": start_id})
-    end = routing_service.graph.find_one({"_id": end_id})
+    # Look up nodes in the in-memory graph
+    road_graph = await routing_service.get_graph()
 
-    if not start:
+    if road_graph.lookup(start_id) is None:
         raise HTTPException(status_code=404, detail=f"Start node '{start_id}' not found.")
 
-    if not end:
+    if road_graph.lookup(end_id) is None:
         raise HTTPException(status_code=404, detail=f"End node '{end_id}' not found.")
 
     # Run A* Routing
-    result = routing_service.find_route(start, end, flooded_roads)
+    result = await routing_service.find_route(start_id, end_id, closures)
 
     # No route found
     if result.get("status") == "NO_ROUTE":
@@ -44,3 +48,174 @@ def get_route(
         "path": result["path"],
         "distance": result["distance"]
     }
+
+
+@router.get("/find")
+async def get_route(
+    start_id: str = Query(..., description="Start node MongoDB ID"),
+    end_id: str = Query(..., description="End node MongoDB ID"),
+    flooded: str = Query("", description="Comma-separated list of flooded road-node IDs"),
+    closure_set: Optional[str] = Query(None, description="Name of a stored closure set to apply")
+):
+    # Split flooded IDs
+    flooded_roads = [f.strip() for f in flooded.split(",") if f.strip()]
+
+    closures = await routing_service.build_closures(
+        flooded_roads, closure_set=await _named_closure_set(closure_set)
+    )
+    return await _route(start_id, end_id, closures)
+
+
+@router.post("/find")
+async def post_route(data: RouteRequest):
+    closures = await routing_service.build_closures(
+        data.flooded,
+        [(e.source, e.target) for e in data.closed_edges],
+        await _named_closure_set(data.closure_set)
+    )
+    return await _route(data.start_id, data.end_id, closures)
+
+
+# =========================================================
+# Coordinates instead of node ids: snapped to the nearest usable node
+# =========================================================
+async def _route_by_coords(start, end, closures, max_snap_km):
+    result = await routing_service.find_route_by_coords(start, end, closures, max_snap_km)
+
+    if result["status"] == "ERROR":
+        raise HTTPException(status_code=404, detail=result["message"])
+
+    if result["status"] == "NO_ROUTE":
+        return {
+            "status": "NO_ROUTE",
+            "path": [],
+            "distance": 0,
+            "start": result["start"],
+            "end": result["end"],
+            "message": "No safe path found — all possible roads may be flooded."
+        }
+
+    return {
+        "status": "OK",
+        "path": result["path"],
+        "distance": result["distance"],
+        "start": result["start"],
+        "end": result["end"]
+    }
+
+
+@router.get("/snap")
+async def snap_to_road(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    max_km: float = Query(5.0, gt=0, description="Furthest the point may be from the node"),
+    flooded: str = Query("", description="Comma-separated list of flooded road-node IDs to skip")
+):
+    closures = await routing_service.build_closures([f.strip() for f in flooded.split(",") if f.strip()])
+    node = await routing_service.snap(lat, lng, closures, max_km)
+    if node is None:
+        raise HTTPException(status_code=404, detail=f"No usable road node within {max_km} km.")
+    return node
+
+
+@router.get("/find/coords")
+async def get_route_by_coords(
+    start_lat: float = Query(..., ge=-90, le=90),
+    start_lng: float = Query(..., ge=-180, le=180),
+    end_lat: float = Query(..., ge=-90, le=90),
+    end_lng: float = Query(..., ge=-180, le=180),
+    max_snap_km: float = Query(5.0, gt=0, description="Furthest a point may be from its road node"),
+    flooded: str = Query("", description="Comma-separated list of flooded road-node IDs"),
+    closure_set: Optional[str] = Query(None, description="Name of a stored closure set to apply")
+):
+    closures = await routing_service.build_closures(
+        [f.strip() for f in flooded.split(",") if f.strip()],
+        closure_set=await _named_closure_set(closure_set)
+    )
+    return await _route_by_coords((start_lat, start_lng), (end_lat, end_lng), closures, max_snap_km)
+
+
+@router.post("/find/coords")
+async def post_route_by_coords(data: CoordRouteRequest):
+    closures = await routing_service.build_closures(
+        data.flooded,
+        [(e.source, e.target) for e in data.closed_edges],
+        await _named_closure_set(data.closure_set)
+    )
+    return await _route_by_coords(
+        (data.start_lat, data.start_lng), (data.end_lat, data.end_lng), closures, data.max_snap_km
+    )
+
+
+@router.post("/matrix")
+async def route_matrix(data: MatrixRequest):
+    road_graph = await routing_service.get_graph()
+    missing = [i for i in data.sources + data.targets if road_graph.lookup(i) is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Unknown road nodes: {', '.join(missing[:20])}")
+
+    closures = await routing_service.build_closures(
+        data.flooded,
+        [(e.source, e.target) for e in data.closed_edges],
+        await _named_closure_set(data.closure_set)
+    )
+    return {
+        "status": "OK",
+        "sources": data.sources,
+        "targets": data.targets,
+        "distances": await routing_service.route_matrix(data.sources, data.targets, closures)
+    }
+
+
+# =========================================================
+# Named closure sets
+# =========================================================
+@router.get("/closures")
+async def list_closure_sets():
+    return await routing_service.list_closure_sets()
+
+
+@router.put("/closures/{name}")
+async def save_closure_set(name: str, data: ClosureSet):
+    return await routing_service.save_closure_set(
+        name, data.nodes, [(e.source, e.target) for e in data.edges]
+    )
+
+
+@router.get("/closures/{name}")
+async def get_closure_set(name: str):
+    closure_set = await _named_closure_set(name)
+    return {
+        "name": closure_set["_id"],
+        "nodes": closure_set.get("nodes", []),
+        "edges": closure_set.get("edges", [])
+    }
+
+
+@router.delete("/closures/{name}")
+async def delete_closure_set(name: str):
+    if not await routing_service.delete_closure_set(name):
+        raise HTTPException(status_code=404, detail=f"Closure set '{name}' not found.")
+    return {"message": "Closure set deleted"}
+
+
+@router.post("/reload")
+async def reload_graph():
+    # Re-read road_graph after the collection has been edited
+    road_graph = await routing_service.load_graph()
+    return {
+        "status": "OK",
+        "nodes": road_graph.num_nodes,
+        "edges": road_graph.num_edges
+    }
+
+
+@router.post("/landmarks")
+async def build_landmarks(count: int = Query(16, ge=1, le=64, description="Number of ALT landmarks")):
+    # Offline-style preprocessing: 2 full Dijkstra runs per landmark
+    landmarks = await routing_service.build_landmarks(count)
+    return {
+        "status": "OK",
+        "landmarks": landmarks.num_landmarks,
+        "fingerprint": landmarks.fingerprint
+    }
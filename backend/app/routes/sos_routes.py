@@ -1,45 +1,112 @@
-from fastapi import APIRouter
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
 from ..models.sos_request import SOSCreate
-from ..services.sos_service import sos_service
+from ..services.sos_service import sos_service, EXPORT_COLUMNS
+from ..services.dispatch_service import dispatch_service
+from ..utils.streaming import export_response, stream_json_array
 
 router = APIRouter(prefix="/sos", tags=["SOS"])
 
-# Async because websocket broadcast is async
+# All handlers are async: MongoDB access goes through the async driver and
+# websocket broadcasts are async, so nothing blocks the event loop.
+
 @router.post("/create")
 async def create_sos(sos: SOSCreate):
     return await sos_service.create_sos(sos)
 
-# Synchronous
+# List endpoints: keyset pages of UI fields, streamed.  Pass the
+# X-Next-Cursor header of a page as ``after`` to get the next one.
+PAGE_LIMIT = 1000
+
+# Served from the in-memory priority queue
 @router.get("/pending")
-def pending_sos():
-    return sos_service.get_pending()
+async def pending_sos(
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_LIMIT, description="Page size / top-k; all when omitted")
+):
+    try:
+        docs, next_cursor = await sos_service.list_pending(after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream_json_array(docs, next_cursor)
+
+@router.get("/pending/count")
+async def pending_count():
+    return {"pending": await sos_service.count_pending()}
+
+@router.put("/priority/{sos_id}")
+async def change_priority(sos_id: str, priority: str):
+    try:
+        return await sos_service.update_priority(sos_id, priority)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-# Async because websocket broadcast is async
 @router.put("/assign/{sos_id}")
 async def assign_sos(sos_id: str, team_email: str):
     return await sos_service.assign_team(sos_id, team_email)
 
-# Async because websocket broadcast is async
+@router.post("/dispatch")
+async def dispatch(dry_run: bool = False, time_budget: float = Query(1.0, gt=0, le=30)):
+    return await dispatch_service.dispatch(dry_run, time_budget)
+
 @router.put("/rescued/{sos_id}")
 async def rescued(sos_id: str):
     return await sos_service.mark_rescued(sos_id)
 
-# Synchronous
 @router.get("/filter")
-def filter_sos(province: str, area: str):
-    return sos_service.get_by_province_area(province, area)
+async def filter_sos(province: str, area: str):
+    return await sos_service.get_by_province_area(province, area)
 
-# Synchronous
 @router.get("/assigned/{rescue_email}")
-def assigned_sos(rescue_email: str):
-    return sos_service.get_assigned_sos(rescue_email)
+async def assigned_sos(rescue_email: str):
+    return await sos_service.get_assigned_sos(rescue_email)
 
-# Synchronous
 @router.get("/rescuedSOS")
-def rescued_sos(rescue_email: str):
-    return sos_service.rescued_sos(rescue_email)
+async def rescued_sos(rescue_email: str):
+    return await sos_service.rescued_sos(rescue_email)
 
-# Synchronous
 @router.get("/sos")
-def get_all_sos():
-    return sos_service.get_all_sos()
+async def get_all_sos(
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_LIMIT, description="Page size; all (streamed) when omitted")
+):
+    try:
+        docs, next_cursor = await sos_service.list_sos(after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream_json_array(docs, next_cursor)
+
+
+# Nearby SOS: answered from the 2dsphere index (or the in-memory KD-tree)
+@router.get("/nearest")
+async def nearest_sos(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=PAGE_LIMIT),
+    status: Optional[str] = Query(None, description="e.g. Pending")
+):
+    return await sos_service.nearest_sos(lat, lng, k, status)
+
+@router.get("/nearby")
+async def sos_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(..., gt=0, le=500),
+    status: Optional[str] = Query(None, description="e.g. Pending"),
+    limit: int = Query(PAGE_LIMIT, ge=1, le=PAGE_LIMIT)
+):
+    return await sos_service.sos_within(lat, lng, radius_km, status, limit)
+
+# Full history for operations / post-event analysis, streamed as it is read
+@router.get("/export")
+async def export_sos(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Compress on the fly (.gz download)"),
+    since: Optional[datetime] = Query(None, description="Created at or after (UTC if no offset)"),
+    until: Optional[datetime] = Query(None, description="Created before (UTC if no offset)"),
+    province: Optional[str] = None,
+    status: Optional[str] = None
+):
+    docs = sos_service.export(since, until, province, status)
+    return export_response(docs, format, EXPORT_COLUMNS, "sos_export", gzip)
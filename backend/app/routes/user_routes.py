@@ -10,15 +10,15 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/signup")
-def signup(user: UserCreate):
+async def signup(user: UserCreate):
     try:
-        return user_service.create_user(user)
+        return await user_service.create_user(user)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login")
-def login(data: LoginRequest):
+async def login(data: LoginRequest):
     try:
-        return user_service.login(data.email, data.password)
+        return await user_service.login(data.email, data.password)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from typing import List, Optional
+from pymongo.errors import BulkWriteError
+
+DURABILITY_MODES = ("fire_and_forget", "ack")
+
+
+class AuditWriter:
+    """
+    Background, batched writer for append-only log collections.
+
+    ``write(doc)`` puts the document on a bounded queue (waiting only when
+    the queue is full) and a single task drains it with unordered
+    ``insert_many`` calls, flushing when ``batch_size`` documents are
+    waiting or ``flush_interval`` seconds after the first one arrived.
+
+    Durability modes:
+
+    * ``fire_and_forget`` -- ``write`` returns once the document is queued;
+      documents still queued when the process dies are lost.
+    * ``ack`` -- ``write`` returns after the batch holding the document was
+      acknowledged by MongoDB, and raises if that document was not
+      written.  Batches do not wait for the interval here (callers are
+      blocked on them); they take whatever queued up while the previous
+      write was in flight.
+
+    ``drain()`` flushes everything queued; call it on shutdown.
+    """
+
+    def __init__(self, collection, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 0.2, durability: str = "fire_and_forget"):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown audit durability '{durability}'")
+        self.collection = collection
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # metrics
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            # started on first use so it binds to the running event loop
+            if self._queue is None or self._queue.empty():
+                self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.create_task(self._run())
+
+    async def write(self, doc: dict):
+        await self.write_many([doc])
+
+    async def write_many(self, docs: List[dict]):
+        self._ensure_worker()
+        ack = self.durability == "ack"
+        futures = []
+        for doc in docs:
+            future = asyncio.get_running_loop().create_future() if ack else None
+            await self._queue.put((doc, future))
+            if future is not None:
+                futures.append(future)
+        if futures:
+            await asyncio.gather(*futures)
+
+    async def drain(self):
+        """Flush everything queued, then stop the writer task."""
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        self._worker = None
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            wait = self.flush_interval if self.durability == "fire_and_forget" else 0.0
+            deadline = time.perf_counter() + wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # never let one bad batch kill the writer: ack callers would wait forever
+                print(f"Audit writer error ({len(batch)} documents dropped): {e}")
+                self.failed += len(batch)
+                self._resolve(batch, e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch):
+        docs = [doc for doc, _ in batch]
+        error, failed = None, ()
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # unordered: everything except the listed documents went in
+            error = e
+            failed = {write_error["index"] for write_error in e.details.get("writeErrors", [])}
+        except Exception as e:
+            # PyMongoError, or e.g. InvalidDocument from an unencodable field
+            error = e
+            failed = range(len(docs))
+
+        self.batches += 1
+        self.written += len(docs) - len(failed)
+        if error is not None:
+            self.failed += len(failed)
+            print(f"Audit write error ({len(failed)} of {len(docs)} documents): {error}")
+
+        self._resolve(batch, error, failed)
+
+    @staticmethod
+    def _resolve(batch, error=None, failed=None):
+        """Settle ack futures: ``error`` for the ``failed`` positions (default all)."""
+        for i, (_, future) in enumerate(batch):
+            if future is None or future.done():
+                continue
+            if error is not None and (failed is None or i in failed):
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    def metrics(self):
+        return {
+            "durability": self.durability,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
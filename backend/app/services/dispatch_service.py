@@ -0,0 +1,165 @@
+import asyncio
+import time
+import numpy as np
+from .sos_service import sos_service, PRIORITY_MAP
+from .rescue_team_service import rescue_team_service
+from .routing_service import routing_service
+
+# Fallback travel estimates (km) when a team or SOS has no road-graph node
+SAME_AREA_KM = 5.0
+SAME_PROVINCE_KM = 50.0
+OTHER_PROVINCE_KM = 500.0
+
+
+def _norm(value):
+    return (value or "").strip().lower()
+
+
+class DispatchService:
+    def __init__(self):
+        # one run at a time: two overlapping runs would both see the same
+        # teams as Available and hand each of them out twice
+        self._lock = asyncio.Lock()
+
+    # =========================================================
+    # Travel-cost matrix (SOS x teams)
+    # =========================================================
+    async def cost_matrix(self, sos_list, teams) -> np.ndarray:
+        """
+        Road distance in km from every team to every SOS (``inf`` when no
+        safe route).  Pairs where either side lacks a road-graph node fall
+        back to a coarse same-area / same-province estimate.
+        """
+        sos_province = np.array([_norm(s.get("province")) for s in sos_list], dtype=str)[:, None]
+        sos_area = np.array([_norm(s.get("area")) for s in sos_list], dtype=str)[:, None]
+        team_province = np.array([_norm(t.get("province")) for t in teams], dtype=str)[None, :]
+        team_area = np.array([_norm(t.get("area")) for t in teams], dtype=str)[None, :]
+
+        same_province = sos_province == team_province
+        costs = np.where(
+            same_province,
+            np.where(sos_area == team_area, SAME_AREA_KM, SAME_PROVINCE_KM),
+            OTHER_PROVINCE_KM
+        ).astype(np.float64)
+
+        road_graph = await routing_service.get_graph()
+        routed_sos = [i for i, s in enumerate(sos_list) if road_graph.lookup(s.get("node_id") or "") is not None]
+        routed_teams = [j for j, t in enumerate(teams) if road_graph.lookup(t.get("node_id") or "") is not None]
+
+        if routed_sos and routed_teams:
+            matrix = await routing_service.route_matrix(
+                [teams[j]["node_id"] for j in routed_teams],
+                [sos_list[i]["node_id"] for i in routed_sos]
+            )
+            distances = np.array(
+                [[np.inf if d is None else d for d in row] for row in matrix], dtype=np.float64
+            )
+            costs[np.ix_(routed_sos, routed_teams)] = distances.T
+
+        return costs
+
+    # =========================================================
+    # Solver: priority-ordered greedy + swap improvement
+    # =========================================================
+    def solve(self, costs: np.ndarray, weights: np.ndarray, time_budget: float = 1.0):
+        """
+        Assign at most one team per SOS and one SOS per team.
+
+        SOS are taken in priority order (``weights`` descending) and each
+        grabs its cheapest free team, so Critical calls are never starved
+        by cheaper Low ones.  The plan is then improved by pairwise team
+        swaps and moves to free teams, minimising sum(weight * travel km),
+        until no move helps or ``time_budget`` seconds have passed.
+
+        Returns a dict ``{sos_index: team_index}``.
+        """
+        deadline = time.perf_counter() + time_budget
+        free = np.ones(costs.shape[1], dtype=bool)
+        assignment = {}
+
+        for i in np.argsort(-weights, kind="stable"):
+            if not free.any():
+                break
+            row = np.where(free, costs[i], np.inf)
+            j = int(np.argmin(row))
+            if np.isfinite(row[j]):
+                assignment[int(i)] = j
+                free[j] = False
+
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            pairs = list(assignment.items())
+
+            # move a call to a free team that is closer
+            for i, j in pairs:
+                row = np.where(free, costs[i], np.inf)
+                k = int(np.argmin(row)) if free.any() else -1
+                if k >= 0 and row[k] < costs[i, j]:
+                    assignment[i] = k
+                    free[k], free[j] = False, True
+                    improved = True
+
+            # swap teams between two calls
+            pairs = list(assignment.items())
+            for a in range(len(pairs)):
+                if time.perf_counter() >= deadline:
+                    break
+                i, j = pairs[a]
+                for b in range(a + 1, len(pairs)):
+                    k, l = pairs[b]
+                    before = weights[i] * costs[i, j] + weights[k] * costs[k, l]
+                    after = weights[i] * costs[i, l] + weights[k] * costs[k, j]
+                    if after < before - 1e-9:
+                        assignment[i], assignment[k] = l, j
+                        pairs[a], pairs[b] = (i, l), (k, j)
+                        j = l
+                        improved = True
+
+        return assignment
+
+    # =========================================================
+    # Run dispatch over the live queue
+    # =========================================================
+    async def dispatch(self, dry_run: bool = False, time_budget: float = 1.0):
+        async with self._lock:
+            return await self._dispatch(dry_run, time_budget)
+
+    async def _dispatch(self, dry_run: bool, time_budget: float):
+        sos_list = await sos_service.get_pending()
+        teams = await rescue_team_service.get_available()
+
+        if not sos_list or not teams:
+            return {"message": "Nothing to dispatch", "assigned": 0, "assignments": []}
+
+        costs = await self.cost_matrix(sos_list, teams)
+        # Low = 1 ... Critical = 4: a km of travel to a Critical call costs 4x
+        weights = np.array(
+            [PRIORITY_MAP.get(s.get("priority", ""), 0) + 1 for s in sos_list], dtype=np.float64
+        )
+        # CPU-bound for up to time_budget seconds: keep it off the event loop
+        assignment = await asyncio.to_thread(self.solve, costs, weights, time_budget)
+
+        plan = [
+            {
+                "sos_id": sos_list[i]["_id"],
+                "rescue_team": teams[j]["email"],
+                "priority": sos_list[i].get("priority"),
+                "distance": float(costs[i, j]),
+            }
+            for i, j in sorted(assignment.items(), key=lambda p: -weights[p[0]])
+        ]
+
+        if dry_run:
+            return {"message": "Dispatch plan", "assigned": 0, "assignments": plan}
+
+        result = await sos_service.assign_teams([(p["sos_id"], p["rescue_team"]) for p in plan])
+        applied = {(a["sos_id"], a["rescue_team"]) for a in result["assignments"]}
+        if applied:
+            await rescue_team_service.update_status_by_email({team for _, team in applied}, "Busy")
+
+        result["assignments"] = [p for p in plan if (p["sos_id"], p["rescue_team"]) in applied]
+        return result
+
+
+dispatch_service = DispatchService()
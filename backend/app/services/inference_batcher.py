@@ -0,0 +1,89 @@
+import asyncio
+import time
+from typing import Any, Callable, List, Optional
+
+
+class InferenceBatcher:
+    """
+    Micro-batching scheduler for model calls.
+
+    Concurrent ``submit(row)`` calls are collected into one list -- until
+    ``max_batch`` rows are waiting or ``max_wait`` seconds have passed since
+    the first one arrived -- and ``predict_many(rows)`` runs once for all of
+    them in a worker thread.  Each caller gets its own element of the
+    returned list.  If a batch fails, its rows are retried one by one so a
+    single bad row only fails its own caller.
+    """
+
+    def __init__(self, predict_many: Callable[[List[Any]], List[Any]], max_batch: int = 256, max_wait: float = 0.005):
+        self.predict_many = predict_many
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # metrics
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, row):
+        if self._worker is None or self._worker.done():
+            # started on first use so it binds to the running event loop
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # callers that gave up (cancelled) are skipped
+            batch = [(row, future) for row, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            self.batches += 1
+            self.rows += len(batch)
+            await self._resolve(batch)
+
+    async def _resolve(self, batch):
+        try:
+            results = await asyncio.to_thread(self.predict_many, [row for row, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                future = batch[0][1]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            for item in batch:
+                await self._resolve([item])
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": round(self.rows / self.batches, 2) if self.batches else 0,
+        }
@@ -0,0 +1,186 @@
+import json
+import os
+import time
+import numpy as np
+from typing import Callable, List, Optional
+from .road_graph import RoadGraph, dijkstra
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+LANDMARKS_DIR = os.path.join(BASE_DIR, "ml_models", "artifacts", "routing")
+
+
+class LandmarkIndex:
+    """
+    ALT (A*, Landmarks, Triangle inequality) preprocessing for a RoadGraph.
+
+    For every landmark L we keep ``d(L, v)`` and ``d(v, L)`` for all nodes v.
+    By the triangle inequality
+
+        d(v, t) >= d(L, t) - d(L, v)    and    d(v, t) >= d(v, L) - d(t, L)
+
+    which gives a consistent A* heuristic far tighter than straight-line
+    distance.  Closing roads can only make real distances longer, so the
+    bounds stay valid under any closure set and nothing needs repairing.
+
+    Both distances are packed into one (n, 2k) float32 table, row v being
+    ``[d(L_1, v) .. d(L_k, v), -d(v, L_1) .. -d(v, L_k)]``, so a bound is a
+    row subtraction and max.  Unreachable pairs are stored as
+    ``±UNREACHABLE`` instead of inf so the arithmetic never produces NaN.
+
+    The table is held in RAM with its rows in Z-order of the node
+    positions, so nodes close on the map sit in the same ``BLOCK`` of rows
+    whatever order the graph numbered them in; see ``heuristic``.
+    """
+
+    TABLE_FILE = "landmarks.npy"
+    META_FILE = "landmarks_meta.json"
+    UNREACHABLE = 1e30
+    BLOCK_SHIFT = 6  # heuristic bounds are computed 64 rows at a time
+
+    def __init__(self, landmarks: List[int], table, fingerprint: str, epsilon: float, order):
+        self.landmarks = list(landmarks)
+        self.fingerprint = fingerprint
+        self.epsilon = epsilon  # float32 rounding slack subtracted from every bound
+
+        # rows[rank[v]] is node v's row
+        order = np.asarray(order, dtype=np.int64)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        self.rows = np.ascontiguousarray(np.asarray(table, dtype=np.float32)[order])
+        self._rank = rank
+        self._rank_list = rank.tolist()
+
+    @property
+    def table(self) -> np.ndarray:
+        """The (n, 2k) table in node order."""
+        return self.rows[self._rank]
+
+    @property
+    def num_landmarks(self) -> int:
+        return len(self.landmarks)
+
+    # -------------------------------
+    # Preprocessing
+    # -------------------------------
+    @classmethod
+    def build(cls, graph: RoadGraph, num_landmarks: int = 16, seed: int = 0):
+        """Pick landmarks by farthest-point selection and compute the table."""
+        n = graph.num_nodes
+        num_landmarks = max(1, min(num_landmarks, n))
+        reverse = graph.reverse()
+        rng = np.random.default_rng(seed)
+
+        landmarks, columns_from, columns_to = [], [], []
+        # seed with the node farthest from a random start
+        nearest = dijkstra(graph, int(rng.integers(n)))
+
+        while len(landmarks) < num_landmarks:
+            reachable = np.where(np.isfinite(nearest), nearest, -1.0)
+            reachable[landmarks] = -1.0
+            candidate = int(np.argmax(reachable))
+            if reachable[candidate] < 0:
+                break
+
+            d_from = dijkstra(graph, candidate)
+            d_to = dijkstra(reverse, candidate)
+            landmarks.append(candidate)
+            columns_from.append(d_from)
+            columns_to.append(d_to)
+
+            # next landmark: the node farthest from every landmark chosen so far
+            nearest = d_from if len(landmarks) == 1 else np.fmin(nearest, d_from)
+
+        table = np.hstack([np.stack(columns_from, axis=1), -np.stack(columns_to, axis=1)])
+
+        # float32 storage: absorb its rounding so bounds never overshoot
+        finite = np.abs(table[np.isfinite(table)])
+        largest = float(finite.max()) if finite.size else 0.0
+        epsilon = 4 * float(np.spacing(np.float32(largest)))
+
+        table = np.clip(table, -cls.UNREACHABLE, cls.UNREACHABLE).astype(np.float32)
+        return cls(landmarks, table, graph.fingerprint(), epsilon, z_order(graph.lat, graph.lng))
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def save(self, graph: RoadGraph, directory: str = LANDMARKS_DIR):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, self.TABLE_FILE), np.ascontiguousarray(self.table))
+        with open(os.path.join(directory, self.META_FILE), "w") as f:
+            json.dump({
+                "fingerprint": self.fingerprint,
+                "landmarks": [graph.ids[i] for i in self.landmarks],
+                "num_nodes": graph.num_nodes,
+                "epsilon": self.epsilon,
+                "created": time.time(),
+            }, f)
+
+    @classmethod
+    def load(cls, graph: RoadGraph, directory: str = LANDMARKS_DIR) -> Optional["LandmarkIndex"]:
+        """Load a saved index into RAM; ``None`` if missing or built for another graph."""
+        meta_path = os.path.join(directory, cls.META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") != graph.fingerprint():
+            return None
+
+        table = np.load(os.path.join(directory, cls.TABLE_FILE))
+        landmarks = [graph.index[node_id] for node_id in meta["landmarks"]]
+        return cls(landmarks, table, meta["fingerprint"], meta["epsilon"], z_order(graph.lat, graph.lng))
+
+    # -------------------------------
+    # Query-time heuristic
+    # -------------------------------
+    def heuristic(self, target: int) -> Callable[[int], float]:
+        """
+        ALT lower bound (km) from any node to ``target``.
+
+        A bound on its own is a 2k-wide NumPy op whose call overhead costs
+        more than the arithmetic.  So the first node asked for in a block
+        gets the bounds of its whole block of rows in one vectorized step.
+        Its map neighbours are mostly in that block and are then answered
+        by a list lookup.  Blocks are cached for this query only.
+        """
+        rows, rank, epsilon = self.rows, self._rank_list, self.epsilon
+        at_target = rows[rank[target]]
+        shift = self.BLOCK_SHIFT
+        size = 1 << shift
+        blocks = {}
+
+        def h(v: int) -> float:
+            row = rank[v]
+            block = row >> shift
+            bounds = blocks.get(block)
+            if bounds is None:
+                lo = block << shift
+                bound = (at_target - rows[lo:lo + size]).max(axis=1).astype(np.float64) - epsilon
+                bounds = blocks[block] = np.maximum(bound, 0.0).tolist()
+            return bounds[row & (size - 1)]
+
+        return h
+
+
+def _spread_bits(x: np.ndarray) -> np.ndarray:
+    """Spread the low 16 bits of ``x`` to the even bit positions."""
+    x = x & 0xFFFF
+    x = (x | (x << 8)) & 0x00FF00FF
+    x = (x | (x << 4)) & 0x0F0F0F0F
+    x = (x | (x << 2)) & 0x33333333
+    return (x | (x << 1)) & 0x55555555
+
+
+def z_order(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Node indices sorted along a Z-order (Morton) curve over a 2^16 x 2^16 grid."""
+    if len(lat) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    def quantize(values):
+        values = np.asarray(values, dtype=np.float64)
+        span = max(float(np.ptp(values)), 1e-12)
+        return ((values - values.min()) / span * 0xFFFF).astype(np.uint64)
+
+    codes = _spread_bits(quantize(lat)) | (_spread_bits(quantize(lng)) << np.uint64(1))
+    return np.argsort(codes, kind="stable")
@@ -1,59 +1,158 @@
+import asyncio
 import numpy as np
-from ..config import db
-from ..ml_models.loader import (
-    scaler,
-    rf_flood_model,
-    pre_flood_severity_model,
-    pre_flood_severity_label_encoder,
-    province_encoder
-)
+import pandas as pd
+from ..config import db, settings
+from ..ml_models.loader import artifacts  # loaded on first use
+from ..ml_models.risk_grid import RiskGrid
+from typing import List
 from ..models.prediction import FloodPredictionInput, FloodPredictionOutput
+from .inference_batcher import InferenceBatcher
+from .prediction_cache import PredictionCache
+from .audit_writer import AuditWriter
+from ..utils.db_utils import created_between, export_documents
+from ..utils.feature_engineering import FLOOD_NUM_COLUMNS
+
+# Column names the severity pipeline was fitted on (model2.py)
+SEVERITY_FEATURES = ["Rain_mm", "Temp", "Veg", "Ice"]
+
+# Prediction log fields, in export (CSV) column order
+EXPORT_COLUMNS = ["_id", "created_at", "province", "month", "year", "rain_mm", "temp", "veg", "ice",
+                  "flood_pred", "severity", "confidence"]
 
 class PredictionService:
     def __init__(self):
         self.collection = db["prediction"]
+        # prediction log writes are queued and flushed in batches, off the request path
+        self.audit = AuditWriter(
+            self.collection,
+            max_queue=settings.AUDIT_QUEUE_SIZE,
+            batch_size=settings.AUDIT_BATCH_SIZE,
+            flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+            durability=settings.AUDIT_DURABILITY
+        )
+        # concurrent single predictions share one forest evaluation
+        self.batcher = InferenceBatcher(
+            self._predict_rows,
+            max_batch=settings.ML_BATCH_SIZE,
+            max_wait=settings.ML_BATCH_WAIT_MS / 1000
+        )
+        # repeated dashboard queries skip the forests; dropped when models reload
+        self.cache = PredictionCache(settings.ML_CACHE_SIZE, settings.ML_CACHE_TTL, settings.ML_CACHE_QUANTUM)
+        artifacts.on_reload(self.cache.clear)
+        # precomputed province x month grid (python -m app.ml_models.risk_grid)
+        self._risk_grid = None
+        artifacts.on_reload(self._drop_risk_grid)
 
     def prepare_features(self, input_data: FloodPredictionInput) -> np.ndarray:
+        return self.prepare_features_batch([input_data])
+
+    def prepare_features_batch(self, rows: List[FloodPredictionInput]) -> np.ndarray:
+        """Flood-model feature matrix in FLOOD_FEATURES order: scaled numerics, month, encoded province."""
         numeric_features = np.array([
-            input_data.year,
-            input_data.temp,
-            input_data.ice,
-            input_data.veg,
-            input_data.rain_mm
-        ]).reshape(1, -1)
+            [getattr(r, column.lower()) for column in FLOOD_NUM_COLUMNS] for r in rows
+        ], dtype=np.float64)
+
+        scaled_numeric = artifacts.scaler.transform(numeric_features)
+        month = np.array([[r.month] for r in rows])
 
-        scaled_numeric = scaler.transform(numeric_features)
-        pronvice = input_data.province.title()
-        month = np.array([[input_data.month]])
+        provinces = [r.province.strip().title() for r in rows]
+        unknown = sorted(set(provinces) - set(artifacts.province_encoder.classes_))
+        if unknown:
+            raise Exception(f"Unknown province(s): {', '.join(unknown)}")
 
-        province_encoded = province_encoder.transform([pronvice])
-        if province_encoded.ndim == 1:
-            province_encoded = province_encoded.reshape(1, -1)
+        province_encoded = np.asarray(artifacts.province_encoder.transform(provinces)).reshape(len(rows), -1)
 
         # now all shapes are 2D → safe for hstack
-        final_features = np.hstack([scaled_numeric, month, province_encoded])
-        return final_features
+        return np.hstack([scaled_numeric, month, province_encoded])
+
+    def severity_features(self, rows: List[FloodPredictionInput]) -> pd.DataFrame:
+        return pd.DataFrame(
+            [[r.rain_mm, r.temp, r.veg, max(0, r.ice)] for r in rows],
+            columns=SEVERITY_FEATURES
+        )
 
-    def predict_flood_and_severity(self, input_data: FloodPredictionInput) -> FloodPredictionOutput:
-        flood_features = self.prepare_features(input_data)
+    # =========================================================
+    # Single prediction
+    # =========================================================
+    async def predict_flood_and_severity(self, input_data: FloodPredictionInput) -> FloodPredictionOutput:
+        key = self.cache.key(input_data)
+        result = self.cache.get(key)
+        hit = result is not None
+
+        if not hit:
+            # Micro-batched with other in-flight requests, evaluated off the event loop
+            generation = self.cache.generation
+            result = await self.batcher.submit(input_data)
+            self.cache.put(key, result, generation)
+        flood_pred, flood_conf, severity_pred = result
+
+        # a hit repeats an answer that is already in the log
+        if not (hit and settings.ML_CACHE_DEDUPE_INSERTS):
+            await self.audit.write(self._record(input_data, flood_pred, flood_conf, severity_pred))
+
+        return FloodPredictionOutput(
+            flood=bool(flood_pred),
+            severity=severity_pred
+        )
 
-        flood_pred = rf_flood_model.predict(flood_features)[0]
-        flood_conf = float(rf_flood_model.predict_proba(flood_features)[0].max())
+    def _predict(self, input_data: FloodPredictionInput):
+        return self._predict_rows([input_data])[0]
 
-        severity_features = np.array([[
-            input_data.rain_mm,
-            input_data.temp,
-            input_data.veg,
-            max(0, input_data.ice)
-        ]])
+    def _predict_rows(self, rows: List[FloodPredictionInput]):
+        # per-row (flood_pred, confidence, severity) tuples
+        return list(zip(*self._predict_batch(rows)))
 
-        if flood_pred == 1:
-            severity_encoded = pre_flood_severity_model.predict(severity_features)[0]
-            severity_pred = pre_flood_severity_label_encoder.inverse_transform([severity_encoded])[0]
-        else:
-            severity_pred = "No Flood"
+    # =========================================================
+    # Batch prediction
+    # =========================================================
+    async def predict_batch(self, rows: List[FloodPredictionInput]) -> List[FloodPredictionOutput]:
+        keys = [self.cache.key(row) for row in rows]
+        results = [self.cache.get(key) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
 
-        self.collection.insert_one({
+        if misses:
+            # one evaluation for every row the cache could not answer
+            generation = self.cache.generation
+            computed = await asyncio.to_thread(self._predict_rows, [rows[i] for i in misses])
+            for i, result in zip(misses, computed):
+                results[i] = result
+                self.cache.put(keys[i], result, generation)
+
+        logged = misses if settings.ML_CACHE_DEDUPE_INSERTS else range(len(rows))
+        records = [self._record(rows[i], *results[i]) for i in logged]
+        if records:
+            await self.audit.write_many(records)
+
+        return [
+            FloodPredictionOutput(flood=bool(flood), severity=severity)
+            for flood, _, severity in results
+        ]
+
+    def _predict_batch(self, rows: List[FloodPredictionInput]):
+        """
+        One ``predict_proba`` pass over the whole matrix (the class is its
+        argmax, so the forest is not walked twice), then one severity pass
+        over the flood-positive rows only.
+        """
+        proba = artifacts.rf_flood_model.predict_proba(self.prepare_features_batch(rows))
+        best = proba.argmax(axis=1)
+        flood_pred = artifacts.rf_flood_model.classes_[best]
+        flood_conf = proba[np.arange(len(rows)), best].astype(float).tolist()
+
+        severity_pred = ["No Flood"] * len(rows)
+        flooded = np.flatnonzero(flood_pred == 1)
+        if len(flooded):
+            severity_encoded = artifacts.pre_flood_severity_model.predict(
+                self.severity_features([rows[i] for i in flooded])
+            )
+            labels = artifacts.pre_flood_severity_label_encoder.inverse_transform(severity_encoded)
+            for i, label in zip(flooded, labels):
+                severity_pred[i] = str(label)
+
+        return flood_pred, flood_conf, severity_pred
+
+    def _record(self, input_data: FloodPredictionInput, flood_pred, flood_conf, severity_pred):
+        return {
             "month": input_data.month,
             "year": input_data.year,
             "temp": input_data.temp,
@@ -64,11 +163,35 @@ class PredictionService:
             "flood_pred": bool(flood_pred),
             "severity": severity_pred,
             "confidence": flood_conf
-        })
+        }
 
-        return FloodPredictionOutput(
-            flood=bool(flood_pred),
-            severity=severity_pred
-        )
+    # =========================================================
+    # Prediction log export (streamed from the cursor, creation order)
+    # =========================================================
+    def export(self, since=None, until=None, province: str = None):
+        query = created_between(since, until)
+        if province:
+            query["province"] = province.strip().title()  # stored as in _record
+        return export_documents(self.collection, query, None, settings.EXPORT_BATCH_SIZE)
+
+    # =========================================================
+    # Precomputed risk grid
+    # =========================================================
+    def risk_grid(self) -> RiskGrid:
+        if self._risk_grid is None:
+            self._risk_grid = RiskGrid.load()
+            if self._risk_grid is None:
+                raise FileNotFoundError("Risk grid not built (python -m app.ml_models.risk_grid)")
+        return self._risk_grid
+
+    def _drop_risk_grid(self):
+        self._risk_grid = None
+
+    def reload_models(self):
+        # next prediction reads the artifacts again; the cache is cleared by the registry hook
+        artifacts.reload()
+
+    def metrics(self):
+        return {"batcher": self.batcher.metrics(), "cache": self.cache.metrics(), "audit": self.audit.metrics()}
 
 prediction_service = PredictionService()
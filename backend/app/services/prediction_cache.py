@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from ..models.prediction import FloodPredictionInput
+
+# Float inputs that are bucketed before keying; anything unlisted is exact
+QUANTIZED_FIELDS = ("temp", "ice", "veg", "rain_mm")
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of model outputs with a time-to-live.
+
+    Keys are the normalised ``FloodPredictionInput``: province (title-case),
+    month, year and the float fields rounded to the step in ``quantum``
+    (e.g. ``{"rain_mm": 1.0}`` treats 120.2 and 120.4 mm as the same
+    request).  A hit returns what the models said for the first input that
+    landed in that bucket.  A step of 0 keeps a field exact.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600.0, quantum: Optional[Dict[str, float]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.quantum = {field: step for field, step in (quantum or {}).items() if step}
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self.generation = 0  # bumped by clear(); results computed before that are not stored
+
+        # metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, data: FloodPredictionInput) -> tuple:
+        floats = []
+        for field in QUANTIZED_FIELDS:
+            value = getattr(data, field)
+            step = self.quantum.get(field)
+            floats.append(round(value / step) if step else value)
+        return (data.province.strip().title(), data.month, data.year, *floats)
+
+    def get(self, key):
+        if not self.maxsize:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value, generation: Optional[int] = None):
+        if not self.maxsize or (generation is not None and generation != self.generation):
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -1,32 +1,65 @@
-from ..config import db
+import asyncio
+from typing import Optional
+from ..config import db, settings
+from ..utils.geo_utils import geo_point
+from .spatial_index import GeoIndex
+from pymongo import ASCENDING, GEOSPHERE, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from ..utils.db_utils import ensure_indexes, keyset_page
 from bson import ObjectId
 from passlib.hash import argon2
 from ..models.rescue_team import RescueTeamCreate
 
+# Never sent back to clients
+PRIVATE_FIELDS = {"password": 0}
+# What the team lists in the UI show
+LIST_PROJECTION = {field: 1 for field in ("name", "email", "province", "area", "phone", "availability", "node_id", "geo")}
+
+
 class RescueTeamService:
+    INDEXES = [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        IndexModel([("availability", ASCENDING)], name="availability"),
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+    ]
+
     def __init__(self):
         self.collection = db["rescue_teams"]
+        self.geo = GeoIndex(self.collection, LIST_PROJECTION, settings.GEO_BACKEND, settings.GEO_REFRESH_S)
 
-    def register_team(self, data: RescueTeamCreate):
+    async def ensure_indexes(self):
+        return await ensure_indexes(self.collection, self.INDEXES)
+
+    async def register_team(self, data: RescueTeamCreate):
         # email exists check
-        existing = self.collection.find_one({"email": data.email})
+        existing = await self.collection.find_one({"email": data.email})
         if existing:
             raise Exception("Email already exists")
 
-        hashed = argon2.hash(data.password)
+        # argon2 is deliberately slow: keep it off the event loop
+        hashed = await asyncio.to_thread(argon2.hash, data.password)
 
         team_dict = data.dict()
         team_dict["password"] = hashed
+        lat, lng = team_dict.pop("lat"), team_dict.pop("lng")
+        if lat is not None and lng is not None:
+            team_dict["geo"] = geo_point(lat, lng)
+
+        try:
+            result = await self.collection.insert_one(team_dict)
+        except DuplicateKeyError:
+            # registered concurrently, after the check above
+            raise Exception("Email already exists")
 
-        result = self.collection.insert_one(team_dict)
+        self.geo.upsert({"_id": str(result.inserted_id), **{k: team_dict[k] for k in LIST_PROJECTION if k in team_dict}})
         return {"message": "Rescue Team Registered", "id": str(result.inserted_id)}
 
-    def login(self, email, password):
-        team = self.collection.find_one({"email": email})
+    async def login(self, email, password):
+        team = await self.collection.find_one({"email": email})
         if not team:
             raise Exception("Team not found")
 
-        if not argon2.verify(password, team["password"]):
+        if not await asyncio.to_thread(argon2.verify, password, team["password"]):
             raise Exception("Incorrect password")
 
         return {
@@ -40,23 +73,53 @@ class RescueTeamService:
             "role": "rescue"
         }
 
-    def get_available(self):
-        teams = list(self.collection.find({"availability": "Available"}))
+    async def get_available(self):
+        teams = await self.collection.find({"availability": "Available"}, PRIVATE_FIELDS).to_list(None)
         for t in teams:
             t["_id"] = str(t["_id"])
         return teams
     
-    def get_all_teams(self):
-        teams = list(self.collection.find())
-        for t in teams:
-            t["_id"] = str(t["_id"])
-        return teams
+    async def list_teams(self, available_only: bool = False, after: Optional[str] = None, limit: Optional[int] = None):
+        """Keyset page (or, without a limit, a stream) of teams in _id order, UI fields only."""
+        query = {"availability": "Available"} if available_only else {}
+        return await keyset_page(self.collection, query, LIST_PROJECTION, after, limit)
 
-    def update_status(self, team_id, status):
-        self.collection.update_one(
+    async def update_status(self, team_id, status):
+        await self.collection.update_one(
             {"_id": ObjectId(team_id)},
             {"$set": {"availability": status}}
         )
+        self.geo.update(team_id, availability=status)
         return {"message": "Status Updated"}
 
+    async def update_status_by_email(self, emails, status):
+        await self.collection.update_many(
+            {"email": {"$in": list(emails)}},
+            {"$set": {"availability": status}}
+        )
+        if self.geo.loaded:
+            async for team in self.collection.find({"email": {"$in": list(emails)}}, {"_id": 1}):
+                self.geo.update(str(team["_id"]), availability=status)
+        return {"message": "Status Updated"}
+
+    async def update_location(self, team_id, lat: float, lng: float):
+        team = await self.collection.find_one_and_update(
+            {"_id": ObjectId(team_id)},
+            {"$set": {"geo": geo_point(lat, lng)}},
+            projection=LIST_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if team is None:
+            raise Exception("Team not found")
+        team["_id"] = str(team["_id"])
+        self.geo.upsert(team)
+        return {"message": "Location Updated"}
+
+    # =========================================================
+    # Nearby teams (2dsphere index or in-memory KD-tree)
+    # =========================================================
+    async def nearest_teams(self, lat: float, lng: float, k: int = 5, available_only: bool = True):
+        return await self.geo.nearest(lat, lng, k, {"availability": "Available"} if available_only else None)
+
+
 rescue_team_service = RescueTeamService()
\ No newline at end of file
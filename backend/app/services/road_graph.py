@@ -0,0 +1,392 @@
+import hashlib
+import math
+import numpy as np
+from heapq import heappush, heappop
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+from scipy.spatial import cKDTree
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from ..utils.geo_utils import EARTH_RADIUS_KM, chord_for_km, haversine_km_np, km_for_chord, unit_vectors
+
+
+class Closures:
+    """
+    Closed roads resolved against one RoadGraph.
+
+    ``nodes`` holds closed node indices (a flooded junction), ``edges`` holds
+    closed CSR edge positions (a single flooded directed road).  Both are
+    hashed sets so the search pays O(1) per edge however many roads are shut.
+    """
+
+    def __init__(self, nodes=(), edges=()):
+        self.nodes = set(nodes)
+        self.edges = set(edges)
+
+    def __bool__(self):
+        return bool(self.nodes or self.edges)
+
+    def __len__(self):
+        return len(self.nodes) + len(self.edges)
+
+    def merge(self, other: "Closures") -> "Closures":
+        return Closures(self.nodes | other.nodes, self.edges | other.edges)
+
+
+class RoadGraph:
+    """
+    Compact in-memory copy of the ``road_graph`` collection.
+
+    Nodes are renumbered 0..n-1 and edges are stored CSR-style: the
+    out-edges of node ``i`` are ``targets[offsets[i]:offsets[i + 1]]`` with
+    matching ``weights`` (km).  ``ids``/``index`` map between the MongoDB
+    string ids and the integer node indices.
+    """
+
+    def __init__(self, ids, names, lat, lng, offsets, targets, weights):
+        self.ids: List[str] = list(ids)
+        self.names: List[str] = list(names)
+        self.index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.ids)}
+
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+        # Plain-list mirrors for the pure-Python search loops (indexing a
+        # list is much cheaper than indexing a NumPy array element-wise)
+        self._lists = None
+        self._fingerprint = None
+        self._reverse = None
+        self._spatial = None  # (KD-tree over node positions, has-any-road mask)
+
+        self.heuristic_scale = self._heuristic_scale()
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.ids)
+
+    @property
+    def num_edges(self) -> int:
+        return int(self.targets.shape[0])
+
+    def _heuristic_scale(self) -> float:
+        """
+        Largest factor k such that k * great-circle distance never exceeds
+        the stored weight of any edge.  Scaling the geodesic heuristic by k
+        keeps it admissible (and consistent) even if some road weights were
+        recorded shorter than the straight line between their endpoints.
+        """
+        if self.num_edges == 0:
+            return 1.0
+
+        sources = np.repeat(np.arange(self.num_nodes), np.diff(self.offsets))
+        straight = haversine_km_np(
+            self.lat[sources], self.lng[sources],
+            self.lat[self.targets], self.lng[self.targets]
+        )
+        mask = straight > 0
+        if not mask.any():
+            return 1.0
+
+        ratio = float(np.min(self.weights[mask] / straight[mask]))
+        # small safety margin against floating point rounding
+        return max(0.0, min(1.0, ratio) * (1 - 1e-9))
+
+    # -------------------------------
+    # Builders
+    # -------------------------------
+    @classmethod
+    def from_edges(cls, ids, lat, lng, sources, targets, weights, names=None):
+        n = len(ids)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int32)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        order = np.argsort(sources, kind="stable")
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+
+        if names is None:
+            names = [""] * n
+
+        return cls(ids, names, lat, lng, offsets, targets[order], weights[order])
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[dict]):
+        ids, names, lat, lng, neighbors = [], [], [], [], []
+        for doc in docs:
+            ids.append(str(doc["_id"]))
+            names.append(doc.get("name", ""))
+            lat.append(float(doc.get("lat", 0.0)))
+            lng.append(float(doc.get("lng", 0.0)))
+            neighbors.append(doc.get("neighbors") or {})
+
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        sources, targets, weights = [], [], []
+        for i, adjacent in enumerate(neighbors):
+            for neighbor_id, distance in adjacent.items():
+                j = index.get(neighbor_id)
+                # edges pointing at nodes missing from the collection are unusable
+                if j is None:
+                    continue
+                sources.append(i)
+                targets.append(j)
+                weights.append(float(distance))
+
+        return cls.from_edges(ids, lat, lng, sources, targets, weights, names=names)
+
+    # -------------------------------
+    # Accessors
+    # -------------------------------
+    def lists(self):
+        if self._lists is None:
+            self._lists = (
+                self.offsets.tolist(),
+                self.targets.tolist(),
+                self.weights.tolist(),
+                self.lat.tolist(),
+                self.lng.tolist(),
+            )
+        return self._lists
+
+    def reverse(self) -> "RoadGraph":
+        """Same nodes with every edge flipped (for distances *to* a node)."""
+        if self._reverse is None:
+            sources = np.repeat(np.arange(self.num_nodes), np.diff(self.offsets))
+            self._reverse = RoadGraph.from_edges(
+                self.ids, self.lat, self.lng, self.targets, sources, self.weights, names=self.names
+            )
+        return self._reverse
+
+    def csr(self, closures: Optional[Closures] = None) -> csr_matrix:
+        """SciPy sparse adjacency with every closed node/edge dropped."""
+        n = self.num_nodes
+        if not closures:
+            return csr_matrix((self.weights, self.targets, self.offsets), shape=(n, n))
+
+        keep = np.ones(self.num_edges, dtype=bool)
+        if closures.edges:
+            keep[np.fromiter(closures.edges, dtype=np.int64)] = False
+        if closures.nodes:
+            closed = np.zeros(n, dtype=bool)
+            closed[np.fromiter(closures.nodes, dtype=np.int64)] = True
+            keep &= ~closed[self.targets]
+
+        sources = np.repeat(np.arange(n), np.diff(self.offsets))[keep]
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+        return csr_matrix((self.weights[keep], self.targets[keep], offsets), shape=(n, n))
+
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            digest.update("\n".join(self.ids).encode())
+            for array in (self.offsets, self.targets, self.weights):
+                digest.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def node(self, i: int) -> dict:
+        return {
+            "id": self.ids[i],
+            "name": self.names[i],
+            "lat": float(self.lat[i]),
+            "lng": float(self.lng[i]),
+        }
+
+    def lookup(self, node_id: str) -> Optional[int]:
+        return self.index.get(node_id)
+
+    # -------------------------------
+    # Coordinates -> node
+    # -------------------------------
+    def build_spatial_index(self):
+        """
+        KD-tree over the nodes' unit vectors (exact great-circle order) plus
+        a mask of nodes with at least one road; built once per graph.
+        """
+        if self._spatial is None:
+            degree = np.diff(self.offsets) + np.bincount(self.targets, minlength=self.num_nodes)
+            self._spatial = (cKDTree(unit_vectors(self.lat, self.lng)), degree > 0)
+        return self._spatial
+
+    def snap(self, lat: float, lng: float, closures: Optional[Closures] = None,
+             max_km: Optional[float] = None, candidates: int = 8) -> Optional[Tuple[int, float]]:
+        """
+        Nearest node to (lat, lng) that has roads and is not closed, as
+        ``(index, km)``; ``None`` if there is none within ``max_km``.
+        """
+        tree, connected = self.build_spatial_index()
+        closed = closures.nodes if closures else ()
+        query = unit_vectors(lat, lng)
+        bound = chord_for_km(max_km) if max_km is not None else np.inf
+
+        k = min(candidates, self.num_nodes)
+        while k:
+            chords, rows = tree.query(query, k=k, distance_upper_bound=bound)
+            for chord, row in zip(np.atleast_1d(chords), np.atleast_1d(rows)):
+                if not np.isfinite(chord):
+                    return None  # nothing further within max_km
+                if connected[row] and row not in closed:
+                    return int(row), km_for_chord(chord)
+            if k == self.num_nodes:
+                return None
+            k = min(k * 4, self.num_nodes)
+        return None
+
+    def edge_index(self, u: int, v: int) -> Optional[int]:
+        lo, hi = int(self.offsets[u]), int(self.offsets[u + 1])
+        hits = np.flatnonzero(self.targets[lo:hi] == v)
+        if hits.size == 0:
+            return None
+        return lo + int(hits[0])
+
+    def resolve_closures(self, node_ids: Iterable[str] = (),
+                         edges: Iterable[Tuple[str, str]] = ()) -> Closures:
+        # Ids that are not in the graph are ignored
+        nodes = {self.index[n] for n in node_ids if n in self.index}
+
+        edge_positions = set()
+        for source_id, target_id in edges:
+            u, v = self.index.get(source_id), self.index.get(target_id)
+            if u is None or v is None:
+                continue
+            e = self.edge_index(u, v)
+            if e is not None:
+                edge_positions.add(e)
+
+        return Closures(nodes, edge_positions)
+
+
+# -------------------------------
+# Search
+# -------------------------------
+def geodesic_heuristic(graph: RoadGraph, target: int) -> Callable[[int], float]:
+    """Scaled haversine distance (km) from a node to ``target``."""
+    _, _, _, lat, lng = graph.lists()
+    scale = graph.heuristic_scale * 2 * EARTH_RADIUS_KM
+    t_phi = math.radians(lat[target])
+    t_lambda = math.radians(lng[target])
+    cos_t = math.cos(t_phi)
+    radians, sin, cos, asin, sqrt = math.radians, math.sin, math.cos, math.asin, math.sqrt
+
+    def h(v: int) -> float:
+        phi = radians(lat[v])
+        a = sin((t_phi - phi) / 2) ** 2 + cos(phi) * cos_t * sin((t_lambda - radians(lng[v])) / 2) ** 2
+        return scale * asin(min(1.0, sqrt(a)))
+
+    return h
+
+
+def dijkstra(graph: RoadGraph, source: int, closures: Optional[Closures] = None) -> np.ndarray:
+    """Distances (km) from ``source`` to every node; ``inf`` if unreachable."""
+    offsets, targets, weights, _, _ = graph.lists()
+    closures = closures or Closures()
+    closed_nodes, closed_edges = closures.nodes, closures.edges
+
+    dist = [math.inf] * graph.num_nodes
+    dist[source] = 0.0
+    queue = [(0.0, source)]
+
+    while queue:
+        cost, current = heappop(queue)
+        if cost > dist[current]:
+            continue  # stale entry
+
+        for e in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[e]
+            if neighbor in closed_nodes or e in closed_edges:
+                continue
+
+            new_cost = cost + weights[e]
+            if new_cost < dist[neighbor]:
+                dist[neighbor] = new_cost
+                heappush(queue, (new_cost, neighbor))
+
+    return np.asarray(dist, dtype=np.float64)
+
+
+def distance_matrix(graph: RoadGraph, sources: List[int], targets_wanted: List[int],
+                    closures: Optional[Closures] = None, chunk: int = 16) -> np.ndarray:
+    """
+    (len(sources), len(targets_wanted)) road distances, ``inf`` where
+    unreachable.  Runs SciPy's compiled Dijkstra from ``chunk`` sources at a
+    time so the (chunk, n) scratch rows stay small on province-scale graphs.
+    """
+    adjacency = graph.csr(closures)
+    wanted = np.asarray(targets_wanted, dtype=np.int64)
+    result = np.empty((len(sources), len(wanted)), dtype=np.float64)
+
+    for lo in range(0, len(sources), chunk):
+        rows = csgraph_dijkstra(adjacency, directed=True, indices=sources[lo:lo + chunk])
+        result[lo:lo + chunk] = rows[:, wanted]
+
+    return result
+
+
+def astar(graph: RoadGraph, source: int, target: int,
+          closures: Optional[Closures] = None,
+          heuristic: Optional[Callable[[int], float]] = None,
+          stats: Optional[dict] = None):
+    """
+    A* from ``source`` to ``target`` over node indices.
+
+    Uses a closed set and lazy deletion (stale heap entries are skipped when
+    popped), so every node is expanded at most once.  With a consistent
+    heuristic the first time ``target`` is popped its distance is optimal.
+
+    Returns ``(distance, path)`` with ``path`` a list of node indices, or
+    ``(None, [])`` if the target is unreachable.  If ``stats`` is given it is
+    filled with ``expansions`` and ``pushes`` counters.
+    """
+    offsets, targets, weights, _, _ = graph.lists()
+    closures = closures or Closures()
+    closed_nodes, closed_edges = closures.nodes, closures.edges
+    h = heuristic or geodesic_heuristic(graph, target)
+
+    g = {source: 0.0}
+    parent = {source: source}
+    closed = set()
+    queue = [(h(source), source)]
+    expansions, pushes = 0, 1
+
+    found = False
+    while queue:
+        _, current = heappop(queue)
+        if current in closed:
+            continue  # stale entry
+        closed.add(current)
+        expansions += 1
+
+        if current == target:
+            found = True
+            break
+
+        cost = g[current]
+        for e in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[e]
+
+            # skip flooded junctions, flooded roads and settled nodes
+            if neighbor in closed or neighbor in closed_nodes or e in closed_edges:
+                continue
+
+            new_cost = cost + weights[e]
+            if new_cost < g.get(neighbor, math.inf):
+                g[neighbor] = new_cost
+                parent[neighbor] = current
+                heappush(queue, (new_cost + h(neighbor), neighbor))
+                pushes += 1
+
+    if stats is not None:
+        stats["expansions"] = expansions
+        stats["pushes"] = pushes
+
+    if not found:
+        return None, []
+
+    path = [target]
+    while path[-1] != source:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return g[target], path
@@ -1,101 +1,194 @@
-from heapq import heappush, heappop
-from typing import List
+import asyncio
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
 from ..models.route import RouteResponse
 from ..config import db
+from .road_graph import Closures, RoadGraph, astar, distance_matrix
+from .landmarks import LandmarkIndex
 
 
 class RoutingService:
-    def __init__(self, graph_collection):
+    def __init__(self, graph_collection, closure_collection=None):
         if graph_collection is None:
             raise ValueError("❌ graph_collection is not initialized. Attach MongoDB collection.")
         self.graph = graph_collection
-        self.cache = {}  # local cache
+        self.closure_sets = closure_collection  # named, server-side closure sets
+        self.road_graph = None  # compiled in-memory graph
+        self.landmarks = None   # optional ALT preprocessing for road_graph
+        self._lock = asyncio.Lock()
 
     # -------------------------------
-    # Heuristic (Euclidean Distance)
+    # Load / Reload compiled graph
     # -------------------------------
-    def heuristic(self, a, b):
-        return ((a["lat"] - b["lat"])**2 + (a["lng"] - b["lng"])**2) ** 0.5
+    async def _read_graph(self):
+        docs = await self.graph.find({}, {"name": 1, "lat": 1, "lng": 1, "neighbors": 1}).to_list(None)
+        # CSR build and landmark load are CPU/disk work: keep them off the event loop
+        road_graph = await asyncio.to_thread(RoadGraph.from_documents, docs)
+        # node KD-tree for snapping coordinates, built once per loaded graph
+        await asyncio.to_thread(road_graph.build_spatial_index)
+        landmarks = await asyncio.to_thread(LandmarkIndex.load, road_graph)
+        return road_graph, landmarks
+
+    async def load_graph(self) -> RoadGraph:
+        road_graph, landmarks = await self._read_graph()
+        self.road_graph, self.landmarks = road_graph, landmarks
+        return road_graph
+
+    async def get_graph(self) -> RoadGraph:
+        if self.road_graph is None:
+            async with self._lock:
+                if self.road_graph is None:
+                    await self.load_graph()
+        return self.road_graph
 
     # -------------------------------
-    # Fetch Node (cached)
+    # ALT Landmark Preprocessing
     # -------------------------------
-    def get_node(self, node_id):
-        if node_id in self.cache:
-            return self.cache[node_id]
+    async def build_landmarks(self, num_landmarks: int = 16) -> LandmarkIndex:
+        road_graph = await self.get_graph()
 
-        node = self.graph.find_one({"_id": node_id})
-        if node:
-            self.cache[node_id] = node
-        return node
+        def build():
+            landmarks = LandmarkIndex.build(road_graph, num_landmarks)
+            landmarks.save(road_graph)
+            return landmarks
+
+        landmarks = await asyncio.to_thread(build)
+        if self.road_graph is road_graph:
+            self.landmarks = landmarks
+        return landmarks
+
+    # -------------------------------
+    # Road Closures
+    # -------------------------------
+    async def save_closure_set(self, name: str, nodes: List[str], edges: List[Tuple[str, str]]):
+        await self.closure_sets.update_one(
+            {"_id": name},
+            {"$set": {
+                "nodes": list(nodes),
+                "edges": [{"source": u, "target": v} for u, v in edges]
+            }},
+            upsert=True
+        )
+        return {"message": "Closure set saved", "name": name}
+
+    async def get_closure_set(self, name: str) -> Optional[dict]:
+        return await self.closure_sets.find_one({"_id": name})
+
+    async def list_closure_sets(self):
+        return [
+            {"name": c["_id"], "nodes": len(c.get("nodes", [])), "edges": len(c.get("edges", []))}
+            async for c in self.closure_sets.find()
+        ]
+
+    async def delete_closure_set(self, name: str) -> bool:
+        return (await self.closure_sets.delete_one({"_id": name})).deleted_count > 0
+
+    async def build_closures(self, flooded_ids: Iterable[str] = (),
+                             closed_edges: Iterable[Tuple[str, str]] = (),
+                             closure_set: Optional[dict] = None) -> Closures:
+        road_graph = await self.get_graph()
+        closures = road_graph.resolve_closures(flooded_ids, closed_edges)
+
+        if closure_set:
+            closures = closures.merge(road_graph.resolve_closures(
+                closure_set.get("nodes", []),
+                [(e["source"], e["target"]) for e in closure_set.get("edges", [])]
+            ))
+
+        return closures
 
     # -------------------------------
     # A* Routing Function
     # -------------------------------
-    def find_route(self, start, end, flooded_ids: List[str] = []):
+    async def find_route(self, start_id: str, end_id: str, closures: Optional[Closures] = None):
+        road_graph = await self.get_graph()
+        return await asyncio.to_thread(self._find_route, road_graph, start_id, end_id, closures)
+
+    def _find_route(self, road_graph: RoadGraph, start_id: str, end_id: str, closures: Optional[Closures]):
+        start = road_graph.lookup(start_id)
+        end = road_graph.lookup(end_id)
         if start is None or end is None:
             return {"status": "ERROR", "message": "Start or End node not found."}
 
-        queue = []
-        heappush(queue, (0, start["_id"]))
-
-        visited = {}
-        parent = {}
-
-        while queue:
-            cost, current = heappop(queue)
-
-            if current == end["_id"]:
-                break
-
-            current_node = self.get_node(current)
-            if not current_node or "neighbors" not in current_node:
-                continue
-
-            neighbors = current_node["neighbors"]
-
-            for neighbor_id, distance in neighbors.items():
-
-                # skip flooded roads
-                if neighbor_id in flooded_ids:
-                    continue
-
-                new_cost = cost + float(distance)
+        # Landmark bounds only apply to the graph they were built for
+        landmarks = self.landmarks
+        heuristic = None
+        if landmarks is not None and landmarks.fingerprint == road_graph.fingerprint():
+            heuristic = landmarks.heuristic(end)
 
-                if neighbor_id not in visited or new_cost < visited[neighbor_id]:
-                    visited[neighbor_id] = new_cost
-                    parent[neighbor_id] = current
+        distance, path = astar(road_graph, start, end, closures, heuristic)
 
-                    neighbor_node = self.get_node(neighbor_id)
-                    if not neighbor_node:
-                        continue
-
-                    priority = new_cost + self.heuristic(neighbor_node, end)
-                    heappush(queue, (priority, neighbor_id))
-
-        # -------------------------------
-        # Build the final path
-        # -------------------------------
-        if end["_id"] not in parent:
+        if distance is None:
             return {
                 "status": "NO_ROUTE",
                 "message": "No path found (maybe all paths blocked or flooded)."
             }
 
-        path = []
-        node = end["_id"]
-        while node in parent:
-            path.append(node)
-            node = parent[node]
-        path.append(start["_id"])
-        path.reverse()
-
         return {
             "status": "OK",
-            "path": path,
-            "distance": visited.get(end["_id"], 0)
+            "path": [road_graph.ids[i] for i in path],
+            "distance": distance
         }
 
+    # -------------------------------
+    # Coordinates -> nearest usable node
+    # -------------------------------
+    async def snap(self, lat: float, lng: float, closures: Optional[Closures] = None,
+                   max_km: Optional[float] = None) -> Optional[dict]:
+        road_graph = await self.get_graph()
+        return self._snap(road_graph, lat, lng, closures, max_km)
+
+    def _snap(self, road_graph: RoadGraph, lat, lng, closures, max_km) -> Optional[dict]:
+        hit = road_graph.snap(lat, lng, closures, max_km)
+        if hit is None:
+            return None
+        i, km = hit
+        return {**road_graph.node(i), "snap_km": round(km, 4)}
+
+    async def find_route_by_coords(self, start: Tuple[float, float], end: Tuple[float, float],
+                                   closures: Optional[Closures] = None, max_snap_km: Optional[float] = None):
+        """Snap both points to the nearest non-flooded node with roads, then route between them."""
+        road_graph = await self.get_graph()
+
+        start_node = self._snap(road_graph, *start, closures, max_snap_km)
+        end_node = self._snap(road_graph, *end, closures, max_snap_km)
+        if start_node is None or end_node is None:
+            return {
+                "status": "ERROR",
+                "message": f"No usable road node within {max_snap_km} km of the "
+                           f"{'start' if start_node is None else 'end'} point."
+            }
+
+        result = await asyncio.to_thread(self._find_route, road_graph, start_node["id"], end_node["id"], closures)
+        return {**result, "start": start_node, "end": end_node}
+
+    # -------------------------------
+    # Distance Matrix (dispatch)
+    # -------------------------------
+    async def route_matrix(self, source_ids: List[str], target_ids: List[str],
+                           closures: Optional[Closures] = None) -> List[List[Optional[float]]]:
+        """
+        Road distance (km) for every source/target pair, ``None`` when there
+        is no safe route.  One multi-target Dijkstra per source, or per
+        target on the reversed graph when there are fewer targets.
+        """
+        road_graph = await self.get_graph()
+        return await asyncio.to_thread(self._route_matrix, road_graph, source_ids, target_ids, closures)
+
+    def _route_matrix(self, road_graph: RoadGraph, source_ids, target_ids, closures):
+        closures = closures or Closures()
+        sources = [road_graph.index[i] for i in source_ids]
+        targets = [road_graph.index[i] for i in target_ids]
+
+        # Closures are defined on the forward graph, so only flip the search
+        # direction when the network is fully open
+        if len(targets) < len(sources) and not closures:
+            matrix = distance_matrix(road_graph.reverse(), targets, sources, closures).T
+        else:
+            matrix = distance_matrix(road_graph, sources, targets, closures)
+
+        return [[float(d) if np.isfinite(d) else None for d in row] for row in matrix]
+
 
 # FIXED: Inject proper MongoDB collection
-routing_service = RoutingService(db["road_graph"])
+routing_service = RoutingService(db["road_graph"], db["road_closures"])
@@ -0,0 +1,122 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class PendingQueue:
+    """
+    Indexed priority queue of pending SOS documents.
+
+    Entries are kept in a sorted list of ``(-priority, sos_id)`` keys (highest
+    priority first, ties by id as before) plus an ``sos_id -> key`` index,
+    so insert/remove/re-prioritise are a binary search each and any page of
+    the queue is a slice -- no heap rebuild per read.
+
+    A refresh from MongoDB reads its snapshot while this worker keeps
+    writing: ``begin_rebuild()`` before the read journals those writes and
+    ``rebuild()`` replays them onto the snapshot, so none is overwritten.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[int, str]] = []
+        self._key_of: Dict[str, Tuple[int, str]] = {}
+        self._docs: Dict[str, dict] = {}
+        self._journal: Optional[List[Callable[[], None]]] = None  # writes during a refresh
+        self._lock = threading.RLock()
+        self.ready = False
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, sos_id):
+        return sos_id in self._key_of
+
+    # -------------------------------
+    # Writes
+    # -------------------------------
+    def begin_rebuild(self):
+        """Start journaling writes for a ``rebuild`` whose snapshot is about to be read."""
+        with self._lock:
+            if self._journal is None:
+                self._journal = []
+
+    def abort_rebuild(self):
+        with self._lock:
+            self._journal = None
+
+    def rebuild(self, docs: Iterable[dict], priority_of):
+        keys, key_of, by_id = [], {}, {}
+        for doc in docs:
+            key = (-priority_of(doc), doc["_id"])
+            keys.append(key)
+            key_of[doc["_id"]] = key
+            by_id[doc["_id"]] = doc
+        keys.sort()
+
+        with self._lock:
+            journal, self._journal = self._journal, None
+            self._keys, self._key_of, self._docs = keys, key_of, by_id
+            for write in journal or ():
+                write()
+            self.ready = True
+
+    def _journaled(self, write: Callable[[], None]):
+        if self._journal is not None:
+            self._journal.append(write)
+
+    def push(self, doc: dict, priority: int):
+        """Insert or replace ``doc`` (keyed by its string ``_id``)."""
+        with self._lock:
+            self._journaled(lambda: self.push(doc, priority))
+            self._insert(doc, priority)
+
+    def remove(self, sos_id: str) -> Optional[dict]:
+        with self._lock:
+            self._journaled(lambda: self.remove(sos_id))
+            return self._discard(sos_id)
+
+    def update_priority(self, sos_id: str, priority: int, label: str) -> bool:
+        with self._lock:
+            self._journaled(lambda: self.update_priority(sos_id, priority, label))
+            doc = self._discard(sos_id)
+            if doc is None:
+                return False
+            doc["priority"] = label
+            self._insert(doc, priority)
+            return True
+
+    def _insert(self, doc: dict, priority: int):
+        self._discard(doc["_id"])
+        key = (-priority, doc["_id"])
+        insort(self._keys, key)
+        self._key_of[doc["_id"]] = key
+        self._docs[doc["_id"]] = doc
+
+    def _discard(self, sos_id: str) -> Optional[dict]:
+        key = self._key_of.pop(sos_id, None)
+        if key is None:
+            return None
+        pos = bisect_left(self._keys, key)
+        del self._keys[pos]
+        return self._docs.pop(sos_id)
+
+    # -------------------------------
+    # Reads
+    # -------------------------------
+    def page(self, limit: Optional[int] = None) -> List[dict]:
+        """The first ``limit`` docs in queue order (all when ``None``)."""
+        with self._lock:
+            return [dict(self._docs[sos_id]) for _, sos_id in self._keys[:limit]]
+
+    def top(self, k: int) -> List[dict]:
+        return self.page(k)
+
+    def after(self, key: Optional[Tuple[int, str]], limit: int) -> List[dict]:
+        """
+        Keyset page: up to ``limit`` docs queued after ``key`` (a
+        ``(-priority, sos_id)`` key, ``None`` for the head).  Unlike an
+        offset, a key stays valid while entries ahead of it come and go.
+        """
+        with self._lock:
+            start = 0 if key is None else bisect_right(self._keys, key)
+            return [dict(self._docs[sos_id]) for _, sos_id in self._keys[start:start + limit]]
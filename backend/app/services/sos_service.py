@@ -1,9 +1,15 @@
-from ..config import db
+from ..config import db, settings
 from ..models.sos_request import SOSCreate
-from ..websockets.ws_manager import ws_manager
+from ..websockets.ws_manager import ws_manager, sos_event_topics, topics_for
+from .sos_queue import PendingQueue
+from ..utils.geo_utils import geo_point, geohash_encode
+from .spatial_index import GeoIndex
+from ..utils.db_utils import created_between, ensure_indexes, export_documents, keyset_page
 from bson import ObjectId
-import heapq
+from pymongo import ASCENDING, GEOSPHERE, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure, PyMongoError
 import asyncio
+from typing import Optional
 
 # Unified priority mapping
 PRIORITY_MAP = {
@@ -13,9 +19,72 @@ PRIORITY_MAP = {
     "Low": 0
 }
 
+def priority_value(sos):
+    return PRIORITY_MAP.get(sos.get("priority", ""), 0)
+
+
+# What the SOS lists in the UI show; list endpoints fetch only these
+LIST_FIELDS = ("name", "email", "province", "area", "location", "issue", "priority", "status", "rescue_team", "node_id", "geo")
+LIST_PROJECTION = {field: 1 for field in LIST_FIELDS}
+EXPORT_COLUMNS = ["_id", "created_at", *LIST_FIELDS, "geohash"]
+GEOHASH_PRECISION = 7  # ~150 m cells, a grouping key for heatmaps / analysis
+
+
+def pending_cursor(sos) -> str:
+    """Keyset cursor of a pending SOS: its queue position, priority then id."""
+    return f"{priority_value(sos)}:{sos['_id']}"
+
+
+def _pending_key(cursor: Optional[str]):
+    if not cursor:
+        return None
+    priority, _, sos_id = cursor.partition(":")
+    if not priority.lstrip("-").isdigit() or not sos_id:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return (-int(priority), sos_id)
+
+
+def _project(doc):
+    return {"_id": doc["_id"], **{field: doc[field] for field in LIST_FIELDS if field in doc}}
+
+
+def normalize(value) -> str:
+    # stored next to province / area so lookups are exact, indexable matches
+    return str(value or "").strip().lower()
+
+
 class SosService:
+    INDEXES = [
+        IndexModel([("status", ASCENDING), ("priority", ASCENDING)], name="status_priority"),
+        IndexModel([("status", ASCENDING), ("rescue_team", ASCENDING)], name="status_rescue_team"),
+        IndexModel([("province_norm", ASCENDING), ("area_norm", ASCENDING)], name="province_area_norm"),
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+    ]
+
     def __init__(self):
         self.collection = db["sos"]
+        self.pending = PendingQueue()  # server-resident view of status == "Pending"
+        self.geo = GeoIndex(self.collection, LIST_PROJECTION, settings.GEO_BACKEND, settings.GEO_REFRESH_S)
+
+    # =========================================================
+    # Indexes + normalized province / area (run at startup)
+    # =========================================================
+    async def ensure_indexes(self, batch_size: int = 1000):
+        # SOS written before province_norm / area_norm existed; normalized with
+        # the same function as new writes so equality lookups always agree
+        updates = []
+        async for sos in self.collection.find({"province_norm": {"$exists": False}}, {"province": 1, "area": 1}):
+            updates.append(UpdateOne({"_id": sos["_id"]}, {"$set": {
+                "province_norm": normalize(sos.get("province")),
+                "area_norm": normalize(sos.get("area")),
+            }}))
+            if len(updates) >= batch_size:
+                await self.collection.bulk_write(updates, ordered=False)
+                updates = []
+        if updates:
+            await self.collection.bulk_write(updates, ordered=False)
+
+        return await ensure_indexes(self.collection, self.INDEXES)
 
     # =========================================================
     # Create SOS
@@ -23,8 +92,17 @@ class SosService:
     async def create_sos(self, data: SOSCreate):
         data = data.dict()
         data["status"] = "Pending"
-
-        self.collection.insert_one(data)
+        data["province_norm"] = normalize(data["province"])
+        data["area_norm"] = normalize(data["area"])
+        lat, lng = data.pop("lat"), data.pop("lng")
+        if lat is not None and lng is not None:
+            data["geo"] = geo_point(lat, lng)
+            data["geohash"] = geohash_encode(lat, lng, GEOHASH_PRECISION)
+
+        result = await self.collection.insert_one(data)
+        data["_id"] = str(result.inserted_id)
+        self.pending.push(data, priority_value(data))
+        self.geo.upsert(_project(data))
 
         # WebSocket broadcast
         await ws_manager.broadcast({
@@ -32,78 +110,235 @@ class SosService:
             "name": data["name"],
             "priority": data["priority"],
             "location": data["location"],
-        })
+        }, sos_event_topics(data))
 
         return {"message": "SOS Created"}
 
     # =========================================================
-    # Get Pending SOS (Heap Priority Queue)
+    # Get Pending SOS (Indexed Priority Queue)
     # Highest priority → first
     # =========================================================
-    def get_pending(self):
-        pq = []
-        sos_list = list(self.collection.find({"status": "Pending"}))
+    async def rebuild_pending(self):
+        # this worker's writes during the read are replayed onto the snapshot
+        self.pending.begin_rebuild()
+        try:
+            sos_list = await self.collection.find({"status": "Pending"}).to_list(None)
+        except BaseException:
+            self.pending.abort_rebuild()
+            raise
+        self.pending.rebuild(
+            ({**sos, "_id": str(sos["_id"])} for sos in sos_list), priority_value
+        )
 
-        for sos in sos_list:
-            sos["_id"] = str(sos["_id"])
+    async def get_pending(self, limit: int | None = None):
+        if not self.pending.ready:
+            await self.rebuild_pending()
+        return self.pending.page(limit)
+
+    async def list_pending(self, after: Optional[str] = None, limit: Optional[int] = None, chunk: int = 500):
+        """
+        Pending SOS in queue order (highest priority first) after the
+        ``after`` cursor, projected to LIST_FIELDS.  Returns
+        ``(documents, next_cursor)`` like ``keyset_page``: one page with a
+        ``limit``, otherwise the whole queue read ``chunk`` entries at a time.
+        """
+        if not self.pending.ready:
+            await self.rebuild_pending()
+        key = _pending_key(after)
+
+        if limit is not None:
+            docs = self.pending.after(key, limit + 1)
+            next_cursor = pending_cursor(docs[limit - 1]) if len(docs) > limit else None
+            return _aiter([_project(doc) for doc in docs[:limit]]), next_cursor
+
+        async def walk(key):
+            while True:
+                docs = self.pending.after(key, chunk)
+                for doc in docs:
+                    yield _project(doc)
+                if len(docs) < chunk:
+                    return
+                key = (-priority_value(docs[-1]), docs[-1]["_id"])
+
+        return walk(key), None
+
+    async def count_pending(self):
+        if not self.pending.ready:
+            await self.rebuild_pending()
+        return len(self.pending)
 
-            priority_value = PRIORITY_MAP.get(sos.get("priority", ""), 0)
+    # =========================================================
+    # Change priority of a pending SOS
+    # =========================================================
+    async def update_priority(self, sos_id, priority):
+        if priority not in PRIORITY_MAP:
+            raise Exception(f"Unknown priority '{priority}'")
 
-            # Push as (-priority, id, sos) to sort highest first
-            heapq.heappush(pq, (-priority_value, sos["_id"], sos))
+        updated = await self.collection.update_one(
+            {"_id": ObjectId(sos_id), "status": "Pending"},
+            {"$set": {"priority": priority}}
+        )
+        if updated.matched_count == 0:
+            raise Exception("Pending SOS not found")
 
-        sorted_sos = []
-        while pq:
-            _, _, sos = heapq.heappop(pq)
-            sorted_sos.append(sos)
+        self.pending.update_priority(sos_id, PRIORITY_MAP[priority], priority)
+        self.geo.update(sos_id, priority=priority)
+        return {"message": "Priority Updated"}
 
-        return sorted_sos
+    # =========================================================
+    # Keep the queue in sync with writes from other workers
+    # =========================================================
+    async def watch_pending(self, retry_delay: float = 5.0):
+        """
+        Tail the ``sos`` change stream and mirror it into the pending queue.
+        Any gap (lost resume token, dropped connection) triggers a full
+        rebuild from MongoDB before resuming.  Change streams need a replica
+        set; on a standalone server the queue is instead rebuilt every
+        ``PENDING_REFRESH_S`` seconds, so other workers' writes show up
+        within that interval.  Runs until cancelled.
+        """
+        while True:
+            try:
+                async with await self.collection.watch(full_document="updateLookup") as stream:
+                    # rebuild after the stream is open so nothing falls in between
+                    await self.rebuild_pending()
+                    async for change in stream:
+                        self._apply_change(change)
+            except OperationFailure as e:
+                if e.code == 40573:  # change streams need a replica set
+                    print(f"⚠️ SOS change stream unavailable (standalone MongoDB); "
+                          f"rebuilding the pending queue every {settings.PENDING_REFRESH_S:g}s")
+                    return await self._poll_pending(settings.PENDING_REFRESH_S)
+                print(f"SOS change stream error: {e}")
+                await asyncio.sleep(retry_delay)
+            except PyMongoError as e:
+                print(f"SOS change stream error: {e}")
+                await asyncio.sleep(retry_delay)
+
+    async def _poll_pending(self, interval: float):
+        while True:
+            try:
+                await self.rebuild_pending()
+            except PyMongoError as e:
+                print(f"SOS pending refresh error: {e}")
+            await asyncio.sleep(interval)
+
+    def _apply_change(self, change):
+        sos_id = str(change["documentKey"]["_id"])
+        sos = change.get("fullDocument")
+
+        if change["operationType"] == "delete" or not sos or sos.get("status") != "Pending":
+            self.pending.remove(sos_id)
+        else:
+            sos["_id"] = sos_id
+            self.pending.push(sos, priority_value(sos))
 
     # =========================================================
     # Assign a Rescue Team
     # =========================================================
     async def assign_team(self, sos_id, rescue_email):
 
-        updated = self.collection.update_one(
+        # Previous state tells us whether anything changed and who to notify
+        before = await self.collection.find_one_and_update(
             {"_id": ObjectId(sos_id)},
-            {"$set": {"rescue_team": rescue_email, "status": "Assigned"}}
+            {"$set": {"rescue_team": rescue_email, "status": "Assigned"}},
+            projection={"province": 1, "area": 1, "status": 1, "rescue_team": 1},
+            return_document=ReturnDocument.BEFORE
         )
 
-        if updated.modified_count > 0:
+        if before and (before.get("status"), before.get("rescue_team")) != ("Assigned", rescue_email):
+            self.pending.remove(sos_id)
+            self.geo.update(sos_id, status="Assigned", rescue_team=rescue_email)
             await ws_manager.broadcast({
                 "type": "SOS_ASSIGNED",
                 "sos_id": sos_id,
                 "rescue_team": rescue_email,
-            })
+            }, sos_event_topics(before, rescue_email))
 
         return {"message": "Rescue Team Assigned"}
 
+    # =========================================================
+    # Assign many SOS at once (dispatch optimizer)
+    # =========================================================
+    async def assign_teams(self, assignments):
+        """
+        ``assignments`` is a list of (sos_id, rescue_email).  Written as one
+        bulk update and announced with one message per province/area.
+        """
+        if not assignments:
+            return {"message": "No assignments", "assigned": 0}
+
+        # Only still-pending SOS are taken, so a concurrent manual assignment wins
+        await self.collection.bulk_write([
+            UpdateOne(
+                {"_id": ObjectId(sos_id), "status": "Pending"},
+                {"$set": {"rescue_team": rescue_email, "status": "Assigned"}}
+            )
+            for sos_id, rescue_email in assignments
+        ], ordered=False)
+
+        assigned = {
+            str(sos["_id"]): sos
+            async for sos in self.collection.find(
+                {"_id": {"$in": [ObjectId(sos_id) for sos_id, _ in assignments]}, "status": "Assigned"},
+                {"rescue_team": 1, "province": 1, "area": 1}
+            )
+        }
+        applied = [
+            {"sos_id": sos_id, "rescue_team": rescue_email}
+            for sos_id, rescue_email in assignments
+            if assigned.get(sos_id, {}).get("rescue_team") == rescue_email
+        ]
+
+        # One event per region, published to that region, its teams and admins
+        regions = {}
+        for a in applied:
+            self.pending.remove(a["sos_id"])
+            self.geo.update(a["sos_id"], status="Assigned", rescue_team=a["rescue_team"])
+            sos = assigned[a["sos_id"]]
+            regions.setdefault((sos.get("province"), sos.get("area")), []).append(a)
+
+        for (province, area), group in regions.items():
+            topics = sos_event_topics({"province": province, "area": area})
+            for a in group:
+                topics += topics_for(team=a["rescue_team"])
+            await ws_manager.broadcast({
+                "type": "SOS_ASSIGNED_BULK",
+                "assignments": group,
+            }, topics)
+
+        return {"message": "Rescue Teams Assigned", "assigned": len(applied), "assignments": applied}
+
     # =========================================================
     # Mark SOS as Rescued
     # =========================================================
     async def mark_rescued(self, sos_id):
 
-        updated = self.collection.update_one(
+        before = await self.collection.find_one_and_update(
             {"_id": ObjectId(sos_id)},
-            {"$set": {"status": "Rescued"}}
+            {"$set": {"status": "Rescued"}},
+            projection={"province": 1, "area": 1, "status": 1, "rescue_team": 1},
+            return_document=ReturnDocument.BEFORE
         )
 
-        if updated.modified_count > 0:
+        if before and before.get("status") != "Rescued":
+            self.pending.remove(sos_id)
+            self.geo.update(sos_id, status="Rescued")
             await ws_manager.broadcast({
                 "type": "SOS_RESCUED",
                 "sos_id": sos_id,
-            })
+            }, sos_event_topics(before))
 
         return {"message": "User Rescued Successfully"}
 
     # =========================================================
     # Filter by province + area
     # =========================================================
-    def get_by_province_area(self, province, area):
-        sos_list = list(self.collection.find({
-            "province": {"$regex": f"^{province}$", "$options": "i"},
-            "area": {"$regex": f"^{area}$", "$options": "i"}
-        }))
+    async def get_by_province_area(self, province, area):
+        sos_list = await self.collection.find({
+            "province_norm": normalize(province),
+            "area_norm": normalize(area)
+        }).to_list(None)
 
         for sos in sos_list:
             sos["_id"] = str(sos["_id"])
@@ -113,11 +348,11 @@ class SosService:
     # =========================================================
     # Assigned SOS (team-specific)
     # =========================================================
-    def get_assigned_sos(self, rescue_email):
-        sos_list = list(self.collection.find({
+    async def get_assigned_sos(self, rescue_email):
+        sos_list = await self.collection.find({
             "status": "Assigned",
             "rescue_team": rescue_email
-        }))
+        }).to_list(None)
 
         for sos in sos_list:
             sos["_id"] = str(sos["_id"])
@@ -127,11 +362,11 @@ class SosService:
     # =========================================================
     # Rescued SOS (team-specific)
     # =========================================================
-    def rescued_sos(self, rescue_email):
-        sos_list = list(self.collection.find({
+    async def rescued_sos(self, rescue_email):
+        sos_list = await self.collection.find({
             "status": "Rescued",
             "rescue_team": rescue_email
-        }))
+        }).to_list(None)
 
         for sos in sos_list:
             sos["_id"] = str(sos["_id"])
@@ -139,15 +374,36 @@ class SosService:
         return sos_list
 
     # =========================================================
-    # Get ALL SOS (corrected)
+    # List SOS (keyset pages in _id order, UI fields only)
     # =========================================================
-    def get_all_sos(self):
-        sos_list = list(self.collection.find())
+    async def list_sos(self, after: Optional[str] = None, limit: Optional[int] = None):
+        return await keyset_page(self.collection, {}, LIST_PROJECTION, after, limit)
 
-        for sos in sos_list:
-            sos["_id"] = str(sos["_id"])
+    # =========================================================
+    # Nearby SOS (2dsphere index or in-memory KD-tree)
+    # =========================================================
+    async def nearest_sos(self, lat: float, lng: float, k: int = 10, status: Optional[str] = None):
+        return await self.geo.nearest(lat, lng, k, {"status": status} if status else None)
 
-        return sos_list
+    async def sos_within(self, lat: float, lng: float, radius_km: float, status: Optional[str] = None,
+                         limit: Optional[int] = None):
+        return await self.geo.within(lat, lng, radius_km, {"status": status} if status else None, limit)
+
+    # =========================================================
+    # Export (streamed from the cursor, creation order)
+    # =========================================================
+    def export(self, since=None, until=None, province: Optional[str] = None, status: Optional[str] = None):
+        query = created_between(since, until)
+        if province:
+            query["province_norm"] = normalize(province)
+        if status:
+            query["status"] = status
+        return export_documents(self.collection, query, {"province_norm": 0, "area_norm": 0}, settings.EXPORT_BATCH_SIZE)
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
 
 
 sos_service = SosService()
\ No newline at end of file
@@ -0,0 +1,323 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo.errors import OperationFailure
+from scipy.spatial import cKDTree
+
+from ..utils.geo_utils import (
+    chord_for_km, geo_point, haversine_km_np, km_for_chord, point_lat_lng, unit_vectors
+)
+
+GEO_BACKENDS = ("auto", "mongo", "memory")
+
+
+def _matches(where: Optional[dict]) -> Callable[[dict], bool]:
+    if not where:
+        return lambda doc: True
+    return lambda doc: all(doc.get(field) == value for field, value in where.items())
+
+
+def _build_tree(coords: Dict[str, Tuple[float, float]]):
+    """(KD-tree over unit vectors or None, ids in tree-row order, id -> row)."""
+    ids = list(coords)
+    position = {doc_id: row for row, doc_id in enumerate(ids)}
+    if not ids:
+        return None, ids, position
+    lat_lng = np.array([coords[i] for i in ids], dtype=np.float64)
+    # sliding-midpoint splits: quicker to build (it holds the GIL) and as quick to query
+    return cKDTree(unit_vectors(lat_lng[:, 0], lat_lng[:, 1]), balanced_tree=False), ids, position
+
+
+class SpatialIndex:
+    """
+    In-memory nearest-neighbour index over GeoJSON points.
+
+    A KD-tree over unit vectors (exact great-circle order, see
+    ``unit_vectors``) plus a small delta of points added or moved since it
+    was built, scanned directly; the tree is rebuilt once the delta
+    reaches ``rebuild_at``.  Moved / removed points are tombstoned in the
+    tree.  Other fields (status, availability) are updated in place.
+
+    ``rebuild(docs)`` (a full reload, run in a worker thread) builds the
+    new tree without holding the lock, so event-loop queries and writes
+    never wait on it; writes made meanwhile are journaled and replayed onto
+    the new tree when it is swapped in.
+    """
+
+    def __init__(self, rebuild_at: int = 1024):
+        self.rebuild_at = rebuild_at
+        self._docs: Dict[str, dict] = {}
+        self._coords: Dict[str, Tuple[float, float]] = {}
+        self._tree: Optional[cKDTree] = None
+        self._tree_ids: List[str] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._position: Dict[str, int] = {}   # id -> tree row
+        self._delta: Dict[str, None] = {}     # ids outside the tree (insertion-ordered set)
+        self._journal: Optional[List[Callable[[], None]]] = None  # writes during a full reload
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    # -------------------------------
+    # Writes
+    # -------------------------------
+    def begin_rebuild(self):
+        """Start journaling writes for a ``rebuild(docs)`` about to read its docs."""
+        with self._lock:
+            if self._journal is None:
+                self._journal = []
+
+    def abort_rebuild(self):
+        """Drop the journal of a reload that failed before ``rebuild(docs)``."""
+        with self._lock:
+            self._journal = None
+
+    def rebuild(self, docs=None):
+        """Rebuild the tree from ``docs`` (or fold the delta into it)."""
+        if docs is None:
+            with self._lock:
+                self._install(self._docs, self._coords, _build_tree(self._coords))
+            return
+
+        self.begin_rebuild()
+        new_docs, new_coords = {}, {}
+        for doc in docs:
+            coords = point_lat_lng(doc.get("geo"))
+            if coords is not None:
+                new_docs[doc["_id"]] = doc
+                new_coords[doc["_id"]] = coords
+        tree = _build_tree(new_coords)  # the slow part, outside the lock
+
+        with self._lock:
+            journal, self._journal = self._journal, None
+            self._install(new_docs, new_coords, tree)
+            for write in journal or ():
+                write()
+
+    def _install(self, docs, coords, tree):
+        self._docs, self._coords = docs, coords
+        self._tree, self._tree_ids, self._position = tree
+        self._alive = np.ones(len(self._tree_ids), dtype=bool)
+        self._delta = {}
+
+    def _journaled(self, write: Callable[[], None]) -> bool:
+        if self._journal is None:
+            return False
+        self._journal.append(write)
+        return True
+
+    def upsert(self, doc: dict):
+        """Add or replace ``doc`` (string ``_id``, GeoJSON ``geo``)."""
+        coords = point_lat_lng(doc.get("geo"))
+        with self._lock:
+            self._journaled(lambda: self.upsert(doc))
+            self._drop(doc["_id"])
+            if coords is None:
+                return
+            self._docs[doc["_id"]] = doc
+            self._coords[doc["_id"]] = coords
+            self._delta[doc["_id"]] = None
+            if len(self._delta) >= self.rebuild_at:
+                self.rebuild()
+
+    def update(self, doc_id: str, **fields) -> bool:
+        """Update non-location fields of an indexed doc."""
+        with self._lock:
+            self._journaled(lambda: self.update(doc_id, **fields))
+            doc = self._docs.get(doc_id)
+            if doc is None:
+                return False
+            self._docs[doc_id] = {**doc, **fields}
+            return True
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._journaled(lambda: self.remove(doc_id))
+            self._drop(doc_id)
+
+    def _drop(self, doc_id: str):
+        self._docs.pop(doc_id, None)
+        self._coords.pop(doc_id, None)
+        self._delta.pop(doc_id, None)
+        row = self._position.pop(doc_id, None)
+        if row is not None:
+            self._alive[row] = False
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def nearest(self, lat: float, lng: float, k: int, where: Optional[dict] = None) -> List[dict]:
+        """The ``k`` closest docs matching ``where``, each with ``distance_km``."""
+        match = _matches(where)
+        with self._lock:
+            found = self._scan_delta(lat, lng, match)
+
+            if self._tree is not None:
+                query = unit_vectors(lat, lng)
+                n = len(self._tree_ids)
+                ask = min(n, k)
+                while ask:
+                    chords, rows = self._tree.query(query, k=ask)
+                    chords, rows = np.atleast_1d(chords), np.atleast_1d(rows)
+                    hits = [
+                        (chord, self._tree_ids[row]) for chord, row in zip(chords, rows)
+                        if self._alive[row] and match(self._docs[self._tree_ids[row]])
+                    ]
+                    # enough matches, or nothing left to widen to
+                    if len(hits) >= k or ask == n:
+                        found += [(km_for_chord(chord), doc_id) for chord, doc_id in hits]
+                        break
+                    ask = min(n, ask * 4)
+
+            found.sort()
+            return [self._result(doc_id, km) for km, doc_id in found[:k]]
+
+    def within(self, lat: float, lng: float, radius_km: float, where: Optional[dict] = None,
+               limit: Optional[int] = None) -> List[dict]:
+        """Docs matching ``where`` within ``radius_km``, closest first."""
+        match = _matches(where)
+        with self._lock:
+            found = [(km, doc_id) for km, doc_id in self._scan_delta(lat, lng, match) if km <= radius_km]
+
+            if self._tree is not None:
+                rows = self._tree.query_ball_point(unit_vectors(lat, lng), chord_for_km(radius_km))
+                rows = [row for row in rows if self._alive[row] and match(self._docs[self._tree_ids[row]])]
+                if rows:
+                    ids = [self._tree_ids[row] for row in rows]
+                    lat_lng = np.array([self._coords[doc_id] for doc_id in ids])
+                    km = haversine_km_np(lat, lng, lat_lng[:, 0], lat_lng[:, 1])
+                    found += [(float(d), doc_id) for d, doc_id in zip(km, ids) if d <= radius_km]
+
+            found.sort()
+            return [self._result(doc_id, km) for km, doc_id in found[:limit]]
+
+    def _scan_delta(self, lat, lng, match) -> List[Tuple[float, str]]:
+        ids = [doc_id for doc_id in self._delta if match(self._docs[doc_id])]
+        if not ids:
+            return []
+        lat_lng = np.array([self._coords[doc_id] for doc_id in ids])
+        km = haversine_km_np(lat, lng, lat_lng[:, 0], lat_lng[:, 1])
+        return [(float(d), doc_id) for d, doc_id in zip(km, ids)]
+
+    def _result(self, doc_id: str, km: float) -> dict:
+        return {**self._docs[doc_id], "distance_km": round(km, 4)}
+
+
+class GeoIndex:
+    """
+    Nearest-K / radius queries over one collection's ``geo`` points.
+
+    ``mongo`` answers from the 2dsphere index (``$nearSphere``); ``memory``
+    from a ``SpatialIndex`` loaded from the collection and kept current by
+    this worker's writes, reloaded every ``refresh`` seconds to pick up
+    other workers'; ``auto`` uses MongoDB and falls back to memory if the
+    server refuses geo queries (e.g. the index could not be built).
+    """
+
+    def __init__(self, collection, projection: dict, backend: str = "auto", refresh: float = 30.0):
+        if backend not in GEO_BACKENDS:
+            raise ValueError(f"Unknown GEO_BACKEND '{backend}'")
+        self.collection = collection
+        self.projection = {**projection, "geo": 1}
+        self.backend = backend
+        self.refresh = refresh
+        self.memory = SpatialIndex()
+        self._loaded_at = None
+        self._loading = False
+        self._load_lock = asyncio.Lock()
+
+    @property
+    def in_memory(self) -> bool:
+        return self.backend == "memory"
+
+    @property
+    def loaded(self) -> bool:
+        """Whether an in-memory copy exists (or is loading) that writes should be mirrored into."""
+        return self._loaded_at is not None or self._loading
+
+    # -------------------------------
+    # Keeping the in-memory copy current
+    # -------------------------------
+    def upsert(self, doc: dict):
+        if self.loaded:
+            self.memory.upsert(doc)
+
+    def update(self, doc_id: str, **fields):
+        if self.loaded:
+            self.memory.update(doc_id, **fields)
+
+    def invalidate(self):
+        """Reload on the next query (after writes that can't be mirrored)."""
+        self._loaded_at = None
+
+    async def _ensure_loaded(self):
+        if self._fresh():
+            return
+        async with self._load_lock:
+            if self._fresh():
+                return
+            # writes from here on are journaled and replayed onto the new tree
+            self._loading = True
+            self.memory.begin_rebuild()
+            try:
+                docs = []
+                async for doc in self.collection.find({"geo": {"$exists": True}}, self.projection):
+                    doc["_id"] = str(doc["_id"])
+                    docs.append(doc)
+                await asyncio.to_thread(self.memory.rebuild, docs)
+                self._loaded_at = time.monotonic()
+            except BaseException:
+                self.memory.abort_rebuild()
+                raise
+            finally:
+                self._loading = False
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    async def nearest(self, lat: float, lng: float, k: int, where: Optional[dict] = None) -> List[dict]:
+        return await self._query(lat, lng, k, None, where)
+
+    async def within(self, lat: float, lng: float, radius_km: float, where: Optional[dict] = None,
+                     limit: Optional[int] = None) -> List[dict]:
+        return await self._query(lat, lng, limit, radius_km, where)
+
+    async def _query(self, lat, lng, limit, radius_km, where):
+        if not self.in_memory:
+            try:
+                return await self._query_mongo(lat, lng, limit, radius_km, where)
+            except OperationFailure as e:
+                if self.backend == "mongo":
+                    raise
+                print(f"⚠️ Geo query failed on {self.collection.name} ({e}); using the in-memory index")
+                self.backend = "memory"
+
+        await self._ensure_loaded()
+        if radius_km is None:
+            return self.memory.nearest(lat, lng, limit, where)
+        return self.memory.within(lat, lng, radius_km, where, limit)
+
+    async def _query_mongo(self, lat, lng, limit, radius_km, where):
+        near = {"$geometry": geo_point(lat, lng)}
+        if radius_km is not None:
+            near["$maxDistance"] = radius_km * 1000  # metres
+        cursor = self.collection.find({**(where or {}), "geo": {"$nearSphere": near}}, self.projection)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        docs = await cursor.to_list(None)  # closest first
+        if not docs:
+            return []
+        lat_lng = np.array([point_lat_lng(doc["geo"]) for doc in docs])
+        km = haversine_km_np(lat, lng, lat_lng[:, 0], lat_lng[:, 1])
+        for doc, d in zip(docs, km):
+            doc["_id"] = str(doc["_id"])
+            doc["distance_km"] = round(float(d), 4)
+        return docs
@@ -1,25 +1,41 @@
+import asyncio
 from ..config import db
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+from ..utils.db_utils import ensure_indexes
 from ..models.user import UserCreate
 from passlib.hash import argon2
 
 class UserService:
+    INDEXES = [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ]
+
     def __init__(self):
         self.collection = db["users"]
 
-    def create_user(self, user: UserCreate):
-        existing = self.collection.find_one({"email": user.email})
+    async def ensure_indexes(self):
+        return await ensure_indexes(self.collection, self.INDEXES)
+
+    async def create_user(self, user: UserCreate):
+        existing = await self.collection.find_one({"email": user.email})
         if existing:
             raise Exception("Email already exists")
 
-        hashed = argon2.hash(user.password)
+        # argon2 is deliberately slow: keep it off the event loop
+        hashed = await asyncio.to_thread(argon2.hash, user.password)
 
         user_dict = user.dict()
         user_dict["password"] = hashed
 
-        self.collection.insert_one(user_dict)
+        try:
+            await self.collection.insert_one(user_dict)
+        except DuplicateKeyError:
+            # registered concurrently, after the check above
+            raise Exception("Email already exists")
         return {"message": "User created"}
 
-    def login(self, email: str, password: str):
+    async def login(self, email: str, password: str):
         # Hard-coded admin 
         if email == "admin@minarah.pk" and password == "Admin123":
             return {
@@ -28,11 +44,11 @@ class UserService:
                 "isAdmin": True
             }
 
-        user = self.collection.find_one({"email": email})
+        user = await self.collection.find_one({"email": email})
         if not user:
             raise Exception("User not found")
 
-        if not argon2.verify(password, user["password"]):
+        if not await asyncio.to_thread(argon2.verify, password, user["password"]):
             raise Exception("Incorrect password")
 
         return {
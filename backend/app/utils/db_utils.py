@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+
+async def ensure_indexes(collection, indexes: List[IndexModel]) -> List[str]:
+    """
+    Create ``indexes`` on ``collection`` (a no-op for ones that already
+    exist).  An index that cannot be built -- e.g. a unique index over
+    existing duplicates -- is reported and skipped so the others still get
+    created and startup carries on.
+    """
+    created = []
+    for index in indexes:
+        try:
+            created += await collection.create_indexes([index])
+        except OperationFailure as e:
+            print(f"⚠️ Index {index.document['name']} on {collection.name} not created: {e}")
+    return created
+
+
+def after_id(cursor: Optional[str]) -> dict:
+    """Keyset filter for "documents after ``cursor``" in ``_id`` order."""
+    if not cursor:
+        return {}
+    try:
+        return {"_id": {"$gt": ObjectId(cursor)}}
+    except (InvalidId, TypeError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+async def keyset_page(collection, query: dict, projection: dict, after: Optional[str] = None,
+                      limit: Optional[int] = None, batch_size: int = 500) -> Tuple[AsyncIterator[dict], Optional[str]]:
+    """
+    Documents matching ``query`` in ``_id`` order, starting after the
+    ``after`` cursor, with ``_id`` as a string.
+
+    Returns ``(documents, next_cursor)``.  With a ``limit`` one page is
+    read (plus one document to know whether another page follows) and
+    ``next_cursor`` is where the next page starts, ``None`` on the last
+    one.  Without a limit the documents are a live cursor read
+    ``batch_size`` at a time, so the caller can stream any number of them.
+    """
+    cursor = collection.find({**query, **after_id(after)}, projection).sort("_id", ASCENDING)
+
+    if limit is None:
+        return _stringify_ids(cursor.batch_size(batch_size)), None
+
+    docs = await cursor.limit(limit + 1).to_list(limit + 1)
+    next_cursor = str(docs[limit - 1]["_id"]) if len(docs) > limit else None
+    return _stringify_ids(docs[:limit]), next_cursor
+
+
+async def _stringify_ids(docs):
+    if hasattr(docs, "__aiter__"):
+        async for doc in docs:
+            doc["_id"] = str(doc["_id"])
+            yield doc
+    else:
+        for doc in docs:
+            doc["_id"] = str(doc["_id"])
+            yield doc
+
+
+def created_between(since: Optional[datetime] = None, until: Optional[datetime] = None) -> dict:
+    """
+    Filter on creation time through the ``_id`` index: an ObjectId starts
+    with its creation second, so no timestamp field is needed.  Naive
+    datetimes are taken as UTC; ``until`` is exclusive.
+    """
+    bounds = {}
+    if since is not None:
+        bounds["$gte"] = ObjectId.from_datetime(_utc(since))
+    if until is not None:
+        bounds["$lt"] = ObjectId.from_datetime(_utc(until))
+    return {"_id": bounds} if bounds else {}
+
+
+async def export_documents(collection, query: dict, projection: dict, batch_size: int = 2000) -> AsyncIterator[dict]:
+    """
+    Every document matching ``query`` in ``_id`` (= creation) order, read
+    ``batch_size`` at a time, with ``_id`` as a string and the creation
+    time as ``created_at``.
+    """
+    cursor = collection.find(query, projection).sort("_id", ASCENDING).batch_size(batch_size)
+    async for doc in cursor:
+        oid = doc.pop("_id")
+        yield {"_id": str(oid), "created_at": oid.generation_time.isoformat(), **doc}
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Flood model inputs (training and serving share this column order)
+# -----------------------------
+FLOOD_NUM_COLUMNS = ["Year", "Temp", "Ice", "Veg", "Rain_mm"]  # what the shared scaler is fitted on
+FLOOD_FEATURES = [*FLOOD_NUM_COLUMNS, "Month", "Province_enc"]
+
+# -----------------------------
+# Severity formula (labels for the severity model, model2.py)
+# -----------------------------
+# Rain is the primary driver; vegetation and ice are protective (inverted);
+# temperature affects evaporation and storm intensity.
+SEVERITY_WEIGHTS = {"rain": 0.50, "veg": 0.30, "temp": 0.15, "ice": 0.05}
+
+# score >= SEVERE -> "Severe", score >= MODERATE -> "Moderate", else "Low"
+SEVERE_THRESHOLD = 0.45
+MODERATE_THRESHOLD = 0.25
+
+SEVERITY_COLUMNS = {"rain": "Rain_mm", "veg": "Veg", "temp": "Temp", "ice": "Ice"}
+
+
+def severity_components(rain, veg, temp, ice):
+    """
+    Each factor normalised to its 0-1 risk contribution (vectorised; scalars,
+    arrays or Series).  A missing (NaN) vegetation or ice reading counts as
+    no risk from that factor; a missing rain or temperature makes the score
+    NaN, which labels as "Low" -- the same as the original row-wise formula.
+    """
+    rain = np.asarray(rain, dtype=np.float64)
+    veg = np.asarray(veg, dtype=np.float64)
+    temp = np.asarray(temp, dtype=np.float64)
+    ice = np.asarray(ice, dtype=np.float64)
+
+    return {
+        "rain": np.minimum(rain / 500, 1.0),        # capped for extreme rain
+        "veg": np.fmax(0.0, 1 - veg / 5000),        # inverted: more vegetation, less risk
+        "temp": np.minimum(temp / 50, 1.0),
+        "ice": np.fmax(0.0, (10 - ice) / 10),       # inverted: less ice, more snowmelt risk
+    }
+
+
+def severity_score(df: pd.DataFrame) -> pd.Series:
+    """Weighted severity score per row of a frame with Rain_mm, Veg, Temp, Ice."""
+    components = severity_components(*(_column(df, SEVERITY_COLUMNS[k]) for k in ("rain", "veg", "temp", "ice")))
+    score = sum(SEVERITY_WEIGHTS[k] * components[k] for k in ("rain", "veg", "temp", "ice"))
+    return pd.Series(score, index=df.index, name="Severity_score")
+
+
+def severity_labels(score) -> np.ndarray:
+    score = np.asarray(score, dtype=np.float64)
+    return np.select(
+        [score >= SEVERE_THRESHOLD, score >= MODERATE_THRESHOLD],
+        ["Severe", "Moderate"],
+        default="Low"
+    ).astype(object)
+
+
+def assign_severity(df: pd.DataFrame) -> pd.Series:
+    """Severity label ("Low" / "Moderate" / "Severe") for every row."""
+    return pd.Series(severity_labels(severity_score(df)), index=df.index, name="Severity")
+
+
+def explain_severity(rain_mm: float, temp: float, veg: float, ice: float) -> dict:
+    """Breakdown of the formula for one set of readings."""
+    components = severity_components(rain_mm, veg, temp, ice)
+    contributions = {k: float(SEVERITY_WEIGHTS[k] * components[k]) for k in SEVERITY_WEIGHTS}
+    score = sum(contributions.values())
+
+    return {
+        "severity": str(severity_labels(score)),
+        "score": round(score, 4),
+        "components": {k: round(float(v), 4) for k, v in components.items()},
+        "weights": SEVERITY_WEIGHTS,
+        "contributions": {k: round(v, 4) for k, v in contributions.items()},
+        "thresholds": {"Severe": SEVERE_THRESHOLD, "Moderate": MODERATE_THRESHOLD},
+    }
+
+
+def _column(df: pd.DataFrame, name: str):
+    # the row-wise formula read missing columns as 0
+    return df[name].to_numpy(dtype=np.float64) if name in df else np.zeros(len(df))
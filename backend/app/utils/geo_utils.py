@@ -0,0 +1,85 @@
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km_np(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km between (lat, lng) points in degrees (broadcasts like any ufunc)."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.asarray(lng2) - np.asarray(lng1))
+
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+# =========================================================
+# GeoJSON points
+# =========================================================
+def geo_point(lat: float, lng: float) -> dict:
+    """GeoJSON Point (MongoDB 2dsphere format: [lng, lat])."""
+    return {"type": "Point", "coordinates": [float(lng), float(lat)]}
+
+
+def point_lat_lng(point: dict):
+    """(lat, lng) of a GeoJSON Point, or None."""
+    if not point or point.get("type") != "Point":
+        return None
+    lng, lat = point["coordinates"][:2]
+    return float(lat), float(lng)
+
+
+# =========================================================
+# Unit vectors: great-circle nearest neighbours with a Euclidean KD-tree
+# =========================================================
+def unit_vectors(lat, lng) -> np.ndarray:
+    """
+    Points on the unit sphere, shape (n, 3).  The straight-line (chord)
+    distance between two of them grows monotonically with their
+    great-circle distance, so a KD-tree over these answers exact
+    nearest-neighbour and radius queries for haversine distance.
+    """
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lam = np.radians(np.asarray(lng, dtype=np.float64))
+    cos_phi = np.cos(phi)
+    return np.stack([cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)], axis=-1)
+
+
+def chord_for_km(km: float) -> float:
+    """Chord length on the unit sphere spanning ``km`` of great circle."""
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def km_for_chord(chord: float) -> float:
+    """Great-circle km spanned by a chord of the unit sphere (inverse of chord_for_km)."""
+    return float(2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2)))
+
+
+# =========================================================
+# Geohash
+# =========================================================
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 7) -> str:
+    """Geohash of a point; precision 6 is a ~1.2 x 0.6 km cell, 7 is ~150 m."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+
+    while len(chars) < precision:
+        rng, x = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if x >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+
+    return "".join(chars)
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterable, AsyncIterator, List, Optional
+from fastapi.responses import StreamingResponse
+
+# Header carrying the keyset cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Export formats: media type and file extension
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+def _encode(value):
+    # ObjectId, datetime, ... -> their string form
+    return str(value)
+
+
+async def _json_array(docs: AsyncIterable[dict], chunk_size: int):
+    yield "["
+    chunk, first = [], True
+    async for doc in docs:
+        chunk.append(("" if first else ",") + json.dumps(doc, default=_encode))
+        first = False
+        if len(chunk) >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("]")
+    yield "".join(chunk)
+
+
+def stream_json_array(docs: AsyncIterable[dict], next_cursor: Optional[str] = None,
+                      chunk_size: int = 200) -> StreamingResponse:
+    """
+    A JSON array response written as ``docs`` arrive, ``chunk_size``
+    documents per write: memory stays at one chunk however long the list.
+    """
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return StreamingResponse(_json_array(docs, chunk_size), media_type="application/json", headers=headers)
+
+
+# =========================================================
+# Exports: NDJSON / CSV, optionally gzipped, in ~chunk_bytes writes
+# =========================================================
+async def _ndjson(docs: AsyncIterable[dict], chunk_bytes: int) -> AsyncIterator[bytes]:
+    lines, size = [], 0
+    async for doc in docs:
+        line = json.dumps(doc, default=_encode) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(lines).encode()
+            lines, size = [], 0
+    if lines:
+        yield "".join(lines).encode()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_encode)
+    return value
+
+
+async def _csv(docs: AsyncIterable[dict], columns: List[str], chunk_bytes: int) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for doc in docs:
+        writer.writerow([_csv_value(doc.get(column)) for column in columns])
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def _gzip(chunks: AsyncIterable[bytes], level: int) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(docs: AsyncIterable[dict], fmt: str, columns: List[str], filename: str,
+                    gzip: bool = False, chunk_bytes: int = 64 * 1024, level: int = 6) -> StreamingResponse:
+    """
+    A file download of ``docs`` as NDJSON (every field) or CSV (``columns``),
+    encoded and -- with ``gzip`` -- compressed as the documents arrive, so
+    the export size never shows up in the server's memory.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    media_type, extension = EXPORT_FORMATS[fmt]
+
+    body = _ndjson(docs, chunk_bytes) if fmt == "ndjson" else _csv(docs, columns, chunk_bytes)
+    filename = f"{filename}.{extension}"
+    if gzip:
+        body = _gzip(body, level)
+        media_type, filename = "application/gzip", f"{filename}.gz"
+
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
@@ -0,0 +1,129 @@
+import asyncio
+import uuid
+from typing import Awaitable, Callable, Iterable, List, Optional
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+# deliver(message, topics) -> fan the event out to this worker's sockets
+Deliver = Callable[[dict, Optional[List[str]]], Awaitable[None]]
+
+
+class EventBus:
+    """
+    Where ``ws_manager.broadcast`` events go.  A backend receives every
+    published event and hands it to ``deliver`` (set by the connection
+    manager that owns the bus) in each worker that holds sockets.
+    """
+
+    def __init__(self):
+        self.deliver: Optional[Deliver] = None
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, message: dict, topics: Optional[Iterable[str]] = None):
+        raise NotImplementedError
+
+
+class LocalEventBus(EventBus):
+    """Single process: publish is a direct local fan-out."""
+
+    async def publish(self, message: dict, topics: Optional[Iterable[str]] = None):
+        if self.deliver is not None:
+            await self.deliver(message, None if topics is None else list(topics))
+
+
+class MongoEventBus(EventBus):
+    """
+    Relay through a capped collection shared by every worker / host.
+
+    Events are delivered locally straight away and appended to the capped
+    collection; each worker tails it with a tailable cursor and delivers the
+    events other workers wrote.  Tailable cursors work on a standalone
+    server too (unlike change streams).  Old events simply roll off the
+    end of the collection.
+    """
+
+    def __init__(self, collection, size_bytes: int = 16 * 1024 * 1024, retry_delay: float = 1.0):
+        super().__init__()
+        self.collection = collection
+        self.size_bytes = size_bytes
+        self.retry_delay = retry_delay
+        self.origin = uuid.uuid4().hex  # this worker
+        self._tailer: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self._ensure_collection()
+        # start position is fixed before start() returns, so nothing published after is missed
+        newest = await self.collection.find_one(sort=[("$natural", -1)])
+        self._tailer = asyncio.create_task(self._tail(newest["_id"] if newest else None))
+
+    async def stop(self):
+        if self._tailer is not None:
+            self._tailer.cancel()
+            self._tailer = None
+
+    async def _ensure_collection(self):
+        db = self.collection.database
+        try:
+            await db.create_collection(self.collection.name, capped=True, size=self.size_bytes)
+        except CollectionInvalid:
+            pass  # already there
+
+        # A tailable cursor on an empty capped collection dies at once
+        if await self.collection.find_one() is None:
+            await self.collection.insert_one({"origin": None, "message": None})
+
+    async def publish(self, message: dict, topics: Optional[Iterable[str]] = None):
+        topics = None if topics is None else list(topics)
+        if self.deliver is not None:
+            await self.deliver(message, topics)
+
+        try:
+            await self.collection.insert_one({"origin": self.origin, "message": message, "topics": topics})
+        except PyMongoError as e:
+            # local sockets already have it; other workers miss this one
+            print(f"Event bus publish error: {e}")
+
+    async def _tail(self, last):
+        while True:
+            try:
+                cursor = self.collection.find(
+                    {"_id": {"$gt": last}} if last is not None else {},
+                    cursor_type=CursorType.TAILABLE_AWAIT
+                )
+                # An idle tailable cursor ends each empty await (~1 s) with
+                # StopAsyncIteration but stays alive: keep waiting on the same
+                # cursor instead of re-querying
+                while cursor.alive:
+                    try:
+                        event = await cursor.next()
+                    except StopAsyncIteration:
+                        continue
+                    last = event["_id"]
+                    if event.get("origin") in (None, self.origin):
+                        continue
+                    await self.deliver(event["message"], event.get("topics"))
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                print(f"Event bus tail error: {e}")
+            except Exception as e:
+                print(f"Event bus delivery error: {e}")
+            # Only reached once the cursor is dead (collection rolled over /
+            # connection lost): reopen after the last event seen.  ObjectIds
+            # only order to the second across workers, so a reconnect can
+            # miss events another worker wrote in that same second.
+            await asyncio.sleep(self.retry_delay)
+
+
+def create_event_bus(backend: str) -> EventBus:
+    if backend == "local":
+        return LocalEventBus()
+    if backend == "mongo":
+        from ..config import db, settings
+        return MongoEventBus(db[settings.WS_BUS_COLLECTION], settings.WS_BUS_SIZE_BYTES)
+    raise ValueError(f"Unknown WS_BUS backend '{backend}'")
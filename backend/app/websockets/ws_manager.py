@@ -1,47 +1,302 @@
-from typing import List
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
 from fastapi import WebSocket, WebSocketDisconnect, APIRouter
+from ..config import settings
+from .event_bus import EventBus, LocalEventBus, create_event_bus
 
 router = APIRouter()
 
+
+# =========================================================
+# Topics
+# =========================================================
+def _norm(value) -> str:
+    return str(value or "").strip().lower()
+
+
+def topics_for(province=None, area=None, role=None, team=None) -> List[str]:
+    """
+    Topic keys for a subscription or an event.  An area topic is scoped by
+    its province ("area:sindh/karachi") since area names repeat.
+    """
+    topics = []
+    if province:
+        topics.append(f"province:{_norm(province)}")
+        if area:
+            topics.append(f"area:{_norm(province)}/{_norm(area)}")
+    if role:
+        topics.append(f"role:{_norm(role)}")
+    if team:
+        topics.append(f"team:{_norm(team)}")
+    return topics
+
+
+def sos_event_topics(sos: dict, team=None) -> List[str]:
+    """Who hears about an SOS: its province/area, the assigned team and admins."""
+    return topics_for(sos.get("province"), sos.get("area"), "admin", team or sos.get("rescue_team"))
+
+
+class ClientConnection:
+    """One socket with its own bounded send queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflows = 0  # consecutive broadcasts that found the queue full
+        self.sending_since = None  # perf_counter() when the in-flight send started
+        self.topics: Set[str] = set()
+        self.writer: asyncio.Task | None = None
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, queue_size: int = 100, send_timeout: float = 5.0, max_overflows: int = 10,
+                 bus: EventBus | None = None):
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        # topic -> subscribed clients; clients with no topics get every event
+        self.subscriptions: Dict[str, Set[ClientConnection]] = {}
+        self.unfiltered: Set[ClientConnection] = set()
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.max_overflows = max_overflows
+        self._closing: Set[asyncio.Task] = set()  # close handshakes of dropped clients
+
+        # broadcasts go through the bus so every worker's sockets get them
+        self.bus = bus or LocalEventBus()
+        self.bus.deliver = self.deliver
+
+        # metrics
+        self.sent = 0
+        self.dropped_messages = 0
+        self.dropped_clients = 0
+        self.latencies = deque(maxlen=2000)  # enqueue -> sent, seconds
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = ClientConnection(websocket, self.queue_size)
+        client.writer = asyncio.create_task(self._writer(client))
+        self.active_connections[websocket] = client
+        self.unfiltered.add(client)
         print(f"✅ Client connected. Total: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        client = self.active_connections.pop(websocket, None)
+        if client is not None:
+            self._unsubscribe(client, list(client.topics))
+            self.unfiltered.discard(client)
+            if client.writer is not None and client.writer is not asyncio.current_task():
+                client.writer.cancel()
             print("❌ Client disconnected")
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"Error broadcasting: {e}")
+    # -------------------------------
+    # Subscriptions
+    # -------------------------------
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return
+        for topic in topics:
+            client.topics.add(topic)
+            self.subscriptions.setdefault(topic, set()).add(client)
+        if client.topics:
+            self.unfiltered.discard(client)
+
+    def unsubscribe(self, websocket: WebSocket, topics: Optional[Iterable[str]] = None):
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return
+        self._unsubscribe(client, list(client.topics if topics is None else topics))
+        if not client.topics:
+            self.unfiltered.add(client)
+
+    def _unsubscribe(self, client: ClientConnection, topics: List[str]):
+        for topic in topics:
+            client.topics.discard(topic)
+            subscribers = self.subscriptions.get(topic)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.subscriptions[topic]
+
+    async def _writer(self, client: ClientConnection):
+        try:
+            while True:
+                queued_at, text = await client.queue.get()
+                client.sending_since = time.perf_counter()
+                await client.websocket.send_text(text)
+                client.sending_since = None
+                self.sent += 1
+                self.latencies.append(time.perf_counter() - queued_at)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # dead or hopelessly slow socket: stop sending to it
+            print(f"Error broadcasting: {e}")
+            self.disconnect(client.websocket)
+
+    def _drop(self, client: ClientConnection):
+        self.dropped_clients += 1
+        self.disconnect(client.websocket)
+        # keep a reference until done so the task is not garbage-collected mid-close
+        task = asyncio.create_task(self._close(client.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _enqueue(self, client: ClientConnection, text: str):
+        now = time.perf_counter()
+
+        # A send stuck past the timeout means the link is dead: drop it here
+        # rather than paying for a timeout wrapper on every single send
+        if client.sending_since is not None and now - client.sending_since > self.send_timeout:
+            self._drop(client)
+            return
+
+        item = (now, text)
+        try:
+            client.queue.put_nowait(item)
+            client.overflows = 0
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # Degrade: drop the oldest queued alert to make room for the newest
+        client.overflows += 1
+        self.dropped_messages += 1
+        if client.overflows > self.max_overflows:
+            self._drop(client)
+            return
+
+        try:
+            client.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        client.queue.put_nowait(item)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=1013)  # try again later
+        except Exception:
+            pass
+
+    async def send(self, websocket: WebSocket, message: dict):
+        """Queue a message for one client (never write to the socket directly)."""
+        client = self.active_connections.get(websocket)
+        if client is not None:
+            self._enqueue(client, json.dumps(message))
+
+    async def start(self):
+        await self.bus.start()
+
+    async def stop(self):
+        await self.bus.stop()
+
+    async def broadcast(self, message: dict, topics: Optional[Iterable[str]] = None):
+        """
+        Publish to the clients subscribed to any of ``topics`` (plus clients
+        that never subscribed, which still receive everything), on every
+        worker sharing the event bus.  With no topics the message goes to
+        every connection.
+        """
+        await self.bus.publish(message, topics)
+
+    async def deliver(self, message: dict, topics: Optional[Iterable[str]] = None):
+        """Fan an event out to this worker's sockets."""
+        # Serialize once; every client gets the same string
+        text = json.dumps(message)
+
+        if topics is None:
+            recipients = list(self.active_connections.values())
+        else:
+            recipients = set(self.unfiltered)
+            for topic in topics:
+                recipients.update(self.subscriptions.get(topic, ()))
+
+        for client in recipients:
+            self._enqueue(client, text)
+
+    def metrics(self):
+        depths = [c.queue.qsize() for c in self.active_connections.values()]
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        return {
+            "connections": len(depths),
+            "topics": len(self.subscriptions),
+            "unfiltered_connections": len(self.unfiltered),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "messages_sent": self.sent,
+            "messages_dropped": self.dropped_messages,
+            "clients_dropped": self.dropped_clients,
+            "send_latency_ms_p50": percentile(0.50),
+            "send_latency_ms_p99": percentile(0.99),
+        }
 
 # Global instance
-ws_manager = ConnectionManager()
+ws_manager = ConnectionManager(
+    queue_size=settings.WS_QUEUE_SIZE,
+    send_timeout=settings.WS_SEND_TIMEOUT,
+    max_overflows=settings.WS_MAX_OVERFLOWS,
+    bus=create_event_bus(settings.WS_BUS),
+)
+
+def _client_topics(data: dict) -> List[str]:
+    return topics_for(data.get("province"), data.get("area"), data.get("role"), data.get("team"))
+
 
 # ✅ Fixed Path: Empty string because main.py handles the prefix
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Live updates.  Clients narrow what they receive either on connect
+    (``/ws?province=Sindh&area=Karachi&role=rescue&team=a@b.pk``) or by
+    sending ``{"type": "subscribe", "province": ..., "area": ..., "role": ...,
+    "team": ...}`` (``"unsubscribe"`` takes the same fields, or none for all).
+    Clients that never subscribe keep receiving every event.
+    """
     await ws_manager.connect(websocket)
+    ws_manager.subscribe(websocket, _client_topics(websocket.query_params))
     try:
         while True:
             # Keep the connection open
             data = await websocket.receive_text()
             print(f"📩 Received: {data}")
-            
-            # Echo back
-            await websocket.send_json({"type": "ack", "message": "Server received your message"})
-            
+
+            try:
+                request = json.loads(data)
+            except ValueError:
+                request = None
+
+            if isinstance(request, dict) and request.get("type") == "subscribe":
+                ws_manager.subscribe(websocket, _client_topics(request))
+                client = ws_manager.active_connections.get(websocket)
+                await ws_manager.send(websocket, {"type": "subscribed", "topics": sorted(client.topics) if client else []})
+                continue
+
+            if isinstance(request, dict) and request.get("type") == "unsubscribe":
+                topics = _client_topics(request)
+                ws_manager.unsubscribe(websocket, topics or None)
+                client = ws_manager.active_connections.get(websocket)
+                await ws_manager.send(websocket, {"type": "subscribed", "topics": sorted(client.topics) if client else []})
+                continue
+
+            # Echo back (through the client's queue, never a concurrent send)
+            await ws_manager.send(websocket, {"type": "ack", "message": "Server received your message"})
+
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket)
     except Exception as e:
         print(f"WebSocket Error: {e}")
-        ws_manager.disconnect(websocket)
\ No newline at end of file
+        ws_manager.disconnect(websocket)
+
+
+# async: metrics() reads loop-owned state (connections, latency deque)
+@router.get("/ws/metrics")
+async def websocket_metrics():
+    return ws_manager.metrics()
@@ -0,0 +1,66 @@
+"""
+Compiled forest vs sklearn for the flood model's shape.
+
+Trains a synthetic forest (default 500 trees, depth 10, 7 features, like
+rf_flood_model), compiles it with CompiledForest, checks the outputs are
+identical and compares latency per batch size and the memory held by the
+fitted trees vs the flat node tables.
+
+    python benchmarks/bench_compiled_forest.py --trees 500 --depth 10
+"""
+import argparse
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from common import Timer  # noqa: E402
+from app.ml_models.compiled_forest import CompiledForest  # noqa: E402
+
+
+def tree_bytes(model):
+    # node structs + value arrays of every fitted tree
+    total = 0
+    for estimator in model.estimators_:
+        state = estimator.tree_.__getstate__()
+        total += state["nodes"].nbytes + state["values"].nbytes
+    return total
+
+
+def best_ms(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        with Timer() as t:
+            fn()
+        best = min(best, t.ms)
+    return best
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(5000, 7))
+    y = (X[:, 4] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=len(X)) > 0.8).astype(int)
+    model = RandomForestClassifier(n_estimators=args.trees, max_depth=args.depth, random_state=0).fit(X, y)
+
+    with Timer() as t_compile:
+        compiled = CompiledForest.from_sklearn(model)
+
+    T = rng.normal(size=(max(args.batches), 7))
+    same = np.array_equal(model.predict_proba(T), compiled.predict_proba(T))
+    print(f"{args.trees} trees, depth {compiled.depth}, {compiled.num_nodes:,} nodes; compiled in {t_compile.ms:.0f} ms")
+    print(f"identical predict_proba: {same}")
+    print(f"model memory: sklearn trees {tree_bytes(model) / 1e6:.1f} MB, compiled {compiled.nbytes / 1e6:.1f} MB")
+    print(f"{'rows':>6} {'sklearn ms':>11} {'compiled ms':>12} {'speed-up':>9}")
+
+    for rows in args.batches:
+        batch = T[:rows]
+        sk = best_ms(lambda: model.predict_proba(batch), args.repeats)
+        cf = best_ms(lambda: compiled.predict_proba(batch), args.repeats)
+        print(f"{rows:>6} {sk:>11.2f} {cf:>12.2f} {sk / cf:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 16, 256, 4096])
+    parser.add_argument("--repeats", type=int, default=5)
+    main(parser.parse_args())
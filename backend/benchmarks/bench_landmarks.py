@@ -0,0 +1,66 @@
+"""
+ALT landmark benchmark: preprocessing cost, then node settles and query time
+for plain geodesic A* vs ALT A*, with and without a random closure set.
+
+    python benchmarks/bench_landmarks.py --size 100000 --landmarks 16 --queries 50
+"""
+import argparse
+import tempfile
+import numpy as np
+
+from common import Timer, make_grid_graph, random_pairs
+from app.services.landmarks import LandmarkIndex
+from app.services.road_graph import Closures, astar
+
+
+def compare(graph, index, pairs, closures, label):
+    rows = {"geodesic": [0, 0.0], "alt": [0, 0.0]}
+    for s, t in pairs:
+        stats = {}
+        with Timer() as timer:
+            expected, _ = astar(graph, s, t, closures, stats=stats)
+        rows["geodesic"][0] += stats["expansions"]; rows["geodesic"][1] += timer.ms
+
+        stats = {}
+        with Timer() as timer:
+            got, _ = astar(graph, s, t, closures, index.heuristic(t), stats=stats)
+        rows["alt"][0] += stats["expansions"]; rows["alt"][1] += timer.ms
+
+        if expected is None:
+            assert got is None, (s, t)
+        else:
+            assert got is not None and abs(got - expected) <= 1e-6 * max(1.0, expected), (s, t, got, expected)
+
+    print(f"\n{label}")
+    print(f"{'heuristic':<10}{'settles':>12}{'ms/query':>12}")
+    for name, (settles, ms) in rows.items():
+        print(f"{name:<10}{settles / len(pairs):>12,.0f}{ms / len(pairs):>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--landmarks", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--closed", type=float, default=0.02, help="fraction of nodes closed in the second run")
+    args = parser.parse_args()
+
+    graph = make_grid_graph(args.size)
+    print(f"{graph.num_nodes:,} nodes / {graph.num_edges:,} edges")
+
+    with Timer() as t_build:
+        index = LandmarkIndex.build(graph, args.landmarks)
+    with tempfile.TemporaryDirectory() as directory:
+        index.save(graph, directory)
+        with Timer() as t_load:
+            index = LandmarkIndex.load(graph, directory)
+        print(f"preprocessing {t_build.ms / 1000:.1f} s for {index.num_landmarks} landmarks, "
+              f"load {t_load.ms:.1f} ms")
+
+        pairs = random_pairs(graph, args.queries)
+        compare(graph, index, pairs, None, "open network")
+
+        rng = np.random.default_rng(1)
+        closed = rng.choice(graph.num_nodes, int(graph.num_nodes * args.closed), replace=False)
+        closures = Closures(set(closed.tolist()) - {n for pair in pairs for n in pair})
+        compare(graph, index, pairs, closures, f"{len(closures):,} closed junctions")
@@ -0,0 +1,47 @@
+"""
+Route matrix benchmark: teams x SOS distance matrix on a synthetic grid,
+compared with one A* query per pair (what N x M /route/find calls cost).
+
+    python benchmarks/bench_matrix.py --size 100000 --teams 50 --sos 500
+"""
+import argparse
+import asyncio
+import os
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017/minarah")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import numpy as np  # noqa: E402
+
+from common import Timer, make_grid_graph  # noqa: E402
+from app.services.road_graph import astar  # noqa: E402
+from app.services.routing_service import RoutingService  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--teams", type=int, default=50)
+    parser.add_argument("--sos", type=int, default=500)
+    parser.add_argument("--pairs", type=int, default=50, help="A* pairs timed to extrapolate the N x M cost")
+    args = parser.parse_args()
+
+    graph = make_grid_graph(args.size)
+    service = RoutingService(graph_collection=object())
+    service.road_graph = graph
+
+    rng = np.random.default_rng(3)
+    teams = [graph.ids[i] for i in rng.choice(graph.num_nodes, args.teams, replace=False)]
+    sos = [graph.ids[i] for i in rng.choice(graph.num_nodes, args.sos, replace=False)]
+
+    with Timer() as t_matrix:
+        matrix = asyncio.run(service.route_matrix(teams, sos))
+    print(f"{graph.num_nodes:,} nodes: {args.teams} x {args.sos} matrix in {t_matrix.ms:.0f} ms")
+
+    with Timer() as t_pairs:
+        for k in range(args.pairs):
+            i, j = k % args.teams, (k * 7) % args.sos
+            distance, _ = astar(graph, graph.index[teams[i]], graph.index[sos[j]])
+            assert matrix[i][j] is None or abs(matrix[i][j] - distance) < 1e-6
+    per_pair = t_pairs.ms / args.pairs
+    print(f"A* per pair {per_pair:.1f} ms -> ~{per_pair * args.teams * args.sos / 1000:.0f} s for the full matrix")
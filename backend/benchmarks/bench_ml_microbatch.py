@@ -0,0 +1,74 @@
+"""
+Micro-batching benchmark for concurrent single-row predictions.
+
+Trains a synthetic 500-tree forest shaped like the flood model (7 features)
+and fires ``--requests`` single-row predictions from ``--concurrency``
+concurrent callers, once with one thread hop + ``predict_proba`` per call
+(the old path) and once through ``InferenceBatcher``.
+
+    python benchmarks/bench_ml_microbatch.py --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+import common  # noqa: F401  (puts backend/ on sys.path)
+from app.services.inference_batcher import InferenceBatcher  # noqa: E402
+
+
+def make_model(trees: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(3000, 7))
+    y = (X[:, 4] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=3000) > 0.8).astype(int)
+    return RandomForestClassifier(n_estimators=trees, random_state=seed).fit(X, y), X
+
+
+async def run(label, predict_one, rows, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(row):
+        async with semaphore:
+            start = time.perf_counter()
+            await predict_one(row)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(row) for row in rows))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000
+    print(f"{label:<14} {len(rows) / elapsed:8.0f} req/s   p50 {p50:7.1f} ms   p99 {p99:7.1f} ms")
+
+
+async def main(args):
+    model, X = make_model(args.trees)
+    rows = [X[i % len(X)] for i in range(args.requests)]
+
+    async def unbatched(row):
+        return await asyncio.to_thread(lambda: model.predict_proba(row.reshape(1, -1))[0])
+
+    batcher = InferenceBatcher(
+        lambda batch: list(model.predict_proba(np.vstack(batch))),
+        max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000
+    )
+
+    print(f"{args.requests:,} single-row requests, {args.concurrency} concurrent, {args.trees} trees")
+    await run("per-request", unbatched, rows, args.concurrency)
+    await run("micro-batched", batcher.submit, rows, args.concurrency)
+    print(batcher.metrics())
+    await batcher.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--trees", type=int, default=500)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
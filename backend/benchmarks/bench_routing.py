@@ -0,0 +1,104 @@
+"""
+A* benchmark on synthetic city-sized grids.
+
+Compares the closed-set A* in ``app.services.road_graph`` with the original
+``RoutingService.find_route`` loop (reproduced below over in-memory node
+documents, i.e. with a warm node cache and no MongoDB round trips).
+
+    python benchmarks/bench_routing.py --sizes 10000 100000 1000000 --queries 20
+"""
+import argparse
+from heapq import heappush, heappop
+
+from common import Timer, make_grid_graph, random_pairs
+from app.services.road_graph import astar
+
+
+def to_documents(graph):
+    offsets, targets, weights, lat, lng = graph.lists()
+    docs = {}
+    for i, node_id in enumerate(graph.ids):
+        docs[node_id] = {
+            "_id": node_id,
+            "lat": lat[i],
+            "lng": lng[i],
+            "neighbors": {graph.ids[targets[e]]: weights[e] for e in range(offsets[i], offsets[i + 1])},
+        }
+    return docs
+
+
+def legacy_find_route(docs, start, end, stats):
+    """The pre-rework search: no closed set, degree-space Euclidean heuristic."""
+    def heuristic(a, b):
+        return ((a["lat"] - b["lat"])**2 + (a["lng"] - b["lng"])**2) ** 0.5
+
+    queue = [(0, start["_id"])]
+    visited, parent = {}, {}
+    expansions, pushes = 0, 1
+
+    while queue:
+        cost, current = heappop(queue)
+        expansions += 1
+        if current == end["_id"]:
+            break
+
+        for neighbor_id, distance in docs[current]["neighbors"].items():
+            new_cost = cost + float(distance)
+            if neighbor_id not in visited or new_cost < visited[neighbor_id]:
+                visited[neighbor_id] = new_cost
+                parent[neighbor_id] = current
+                heappush(queue, (new_cost + heuristic(docs[neighbor_id], end), neighbor_id))
+                pushes += 1
+
+    stats["expansions"], stats["pushes"] = expansions, pushes
+    return visited.get(end["_id"])
+
+
+def run(size, queries, legacy_max):
+    with Timer() as t_build:
+        graph = make_grid_graph(size)
+    graph.lists()
+    print(f"\n{graph.num_nodes:,} nodes / {graph.num_edges:,} edges "
+          f"(built in {t_build.ms:.0f} ms, heuristic scale {graph.heuristic_scale:.3f})")
+
+    pairs = random_pairs(graph, queries)
+    docs = to_documents(graph) if graph.num_nodes <= legacy_max else None
+
+    totals = {"new": [0, 0, 0.0], "legacy": [0, 0, 0.0]}
+    worse = 0
+    for s, t in pairs:
+        stats = {}
+        with Timer() as timer:
+            distance, _ = astar(graph, s, t, stats=stats)
+        row = totals["new"]
+        row[0] += stats["expansions"]; row[1] += stats["pushes"]; row[2] += timer.ms
+
+        if docs is not None:
+            stats = {}
+            with Timer() as timer:
+                legacy = legacy_find_route(docs, docs[graph.ids[s]], docs[graph.ids[t]], stats)
+            row = totals["legacy"]
+            row[0] += stats["expansions"]; row[1] += stats["pushes"]; row[2] += timer.ms
+            if distance is not None and legacy is not None and legacy > distance + 1e-9:
+                worse += 1
+
+    print(f"{'impl':<8}{'expansions':>14}{'pushes':>14}{'ms/query':>12}")
+    for name, (exp, push, ms) in totals.items():
+        if name == "legacy" and docs is None:
+            print(f"{name:<8}{'(skipped, graph larger than --legacy-max)':>40}")
+            continue
+        print(f"{name:<8}{exp / queries:>14,.0f}{push / queries:>14,.0f}{ms / queries:>12.2f}")
+    if docs is not None:
+        print(f"legacy returned a longer-than-optimal route in {worse}/{queries} queries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="skip the legacy search above this many nodes (it is very slow)")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.queries, args.legacy_max)
@@ -0,0 +1,84 @@
+"""
+Severity labelling: the original row-wise ``df.apply`` formula vs the
+vectorised ``app.utils.feature_engineering.assign_severity``.
+
+Runs on combined_flood_data.csv (with its missing readings) and on a
+synthetic frame of ``--rows`` rows, checks the labels are identical and
+reports the time of each.
+
+    python benchmarks/bench_severity_labels.py --rows 200000
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from common import Timer  # noqa: E402
+from app.utils.feature_engineering import assign_severity  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "app", "ml_models", "data", "combined_flood_data.csv")
+
+
+def legacy_severity(row):
+    # verbatim copy of the formula model2.py used to apply per row
+    rain = row.get('Rain_mm', 0)
+    veg = row.get('Veg', 0)
+    temp = row.get('Temp', 0)
+    ice = row.get('Ice', 0)
+
+    rain_norm = min(rain / 500, 1.0)
+    veg_norm = max(0, 1 - (veg / 5000))
+    temp_norm = min(temp / 50, 1.0)
+    ice_norm = max(0, (10 - ice) / 10)
+
+    score = (0.50 * rain_norm +
+             0.30 * veg_norm +
+             0.15 * temp_norm +
+             0.05 * ice_norm)
+
+    if score >= 0.45:
+        return "Severe"
+    elif score >= 0.25:
+        return "Moderate"
+    else:
+        return "Low"
+
+
+def synthetic_frame(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Rain_mm": rng.gamma(2.0, 80.0, rows),
+        "Temp": rng.uniform(-10, 50, rows),
+        "Veg": rng.uniform(0, 6000, rows),
+        "Ice": rng.uniform(-0.5, 12, rows),
+    })
+    # sprinkle missing readings like the real data has
+    for column in df:
+        df.loc[rng.random(rows) < 0.02, column] = np.nan
+    return df
+
+
+def compare(name: str, df: pd.DataFrame):
+    with Timer() as legacy_t:
+        legacy = df.apply(legacy_severity, axis=1)
+    with Timer() as vector_t:
+        vectorised = assign_severity(df)
+
+    mismatches = int((legacy != vectorised).sum())
+    print(f"{name:<12} rows={len(df):>8,}  apply={legacy_t.ms:>9.1f} ms  vectorised={vector_t.ms:>7.1f} ms  "
+          f"speed-up={legacy_t.ms / vector_t.ms:>6.1f}x  mismatches={mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    if os.path.exists(DATA_PATH):
+        compare("csv", pd.read_csv(DATA_PATH))
+    compare("synthetic", synthetic_frame(args.rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Snapping GPS points to road nodes: RoadGraph.snap (KD-tree) vs a
+haversine scan over every node.
+
+    python benchmarks/bench_snap.py --nodes 100000
+"""
+import argparse
+import numpy as np
+
+from common import Timer, make_grid_graph  # noqa: E402
+from app.services.road_graph import Closures  # noqa: E402
+from app.utils.geo_utils import haversine_km_np  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--flooded", type=float, default=0.1, help="fraction of nodes closed")
+    args = parser.parse_args()
+
+    graph = make_grid_graph(args.nodes)
+    with Timer() as build:
+        graph.build_spatial_index()
+    print(f"nodes={graph.num_nodes:,}  KD-tree build={build.ms:.1f} ms")
+
+    rng = np.random.default_rng(3)
+    lat = rng.uniform(graph.lat.min(), graph.lat.max(), args.queries)
+    lng = rng.uniform(graph.lng.min(), graph.lng.max(), args.queries)
+    closures = Closures(np.flatnonzero(rng.random(graph.num_nodes) < args.flooded).tolist())
+    closed = np.zeros(graph.num_nodes, dtype=bool)
+    closed[list(closures.nodes)] = True
+
+    def brute(a, b, mask=None):
+        km = haversine_km_np(a, b, graph.lat, graph.lng)
+        if mask is not None:
+            km = np.where(mask, np.inf, km)
+        return int(km.argmin())
+
+    mismatches = sum(
+        graph.snap(a, b)[0] != brute(a, b) or graph.snap(a, b, closures)[0] != brute(a, b, closed)
+        for a, b in zip(lat[:200], lng[:200])
+    )
+    print(f"mismatches vs brute force: {mismatches}")
+
+    for name, fn in (
+        ("snap", lambda a, b: graph.snap(a, b)),
+        (f"snap, {args.flooded:.0%} flooded", lambda a, b: graph.snap(a, b, closures)),
+        ("haversine scan", lambda a, b: brute(a, b)),
+    ):
+        with Timer() as t:
+            for a, b in zip(lat, lng):
+                fn(a, b)
+        print(f"{name:<24}{t.ms * 1000 / args.queries:>10.1f} µs/query")
+
+
+if __name__ == "__main__":
+    main()
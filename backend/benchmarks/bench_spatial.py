@@ -0,0 +1,96 @@
+"""
+In-memory spatial index (KD-tree over unit vectors) vs a brute-force
+haversine scan for nearest-K and radius queries.
+
+Scatters ``--points`` SOS-like points over a Pakistan-sized box, checks the
+index returns exactly the brute-force answers and reports per-query
+latency, build time and the cost of inserts landing in the delta buffer.
+
+    python benchmarks/bench_spatial.py --points 50000
+"""
+import argparse
+import numpy as np
+
+from common import Timer  # noqa: E402
+from app.services.spatial_index import SpatialIndex  # noqa: E402
+from app.utils.geo_utils import geo_point, haversine_km_np  # noqa: E402
+
+
+def make_docs(n, rng):
+    lat = rng.uniform(24.0, 37.0, n)
+    lng = rng.uniform(61.0, 77.0, n)
+    status = rng.choice(["Pending", "Assigned", "Rescued"], n, p=[0.5, 0.3, 0.2])
+    docs = [{"_id": f"{i:024x}", "status": str(s), "geo": geo_point(a, b)} for i, (a, b, s) in enumerate(zip(lat, lng, status))]
+    return docs, lat, lng, status
+
+
+def per_query_ms(fn, queries):
+    with Timer() as t:
+        for q in queries:
+            fn(*q)
+    return t.ms / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=25.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    docs, lat, lng, status = make_docs(args.points, rng)
+    queries = list(zip(rng.uniform(24.0, 37.0, args.queries), rng.uniform(61.0, 77.0, args.queries)))
+
+    index = SpatialIndex()
+    with Timer() as build:
+        index.rebuild(docs)
+    print(f"points={args.points:,}  build={build.ms:.1f} ms")
+
+    pending = status == "Pending"
+
+    def brute_nearest(qlat, qlng, where_pending=False):
+        km = haversine_km_np(qlat, qlng, lat, lng)
+        if where_pending:
+            km = np.where(pending, km, np.inf)
+        return np.sort(km)[:args.k]
+
+    def brute_within(qlat, qlng):
+        km = haversine_km_np(qlat, qlng, lat, lng)
+        return np.sort(km[km <= args.radius_km])
+
+    # exactness
+    mismatches = 0
+    for qlat, qlng in queries[:50]:
+        got = [d["distance_km"] for d in index.nearest(qlat, qlng, args.k)]
+        mismatches += not np.allclose(got, np.round(brute_nearest(qlat, qlng), 4), atol=1e-4)
+        got = [d["distance_km"] for d in index.nearest(qlat, qlng, args.k, {"status": "Pending"})]
+        mismatches += not np.allclose(got, np.round(brute_nearest(qlat, qlng, True), 4), atol=1e-4)
+        got = [d["distance_km"] for d in index.within(qlat, qlng, args.radius_km)]
+        mismatches += not np.allclose(got, np.round(brute_within(qlat, qlng), 4), atol=1e-4)
+    print(f"mismatches vs brute force: {mismatches}")
+
+    rows = [
+        ("nearest k", lambda a, b: index.nearest(a, b, args.k), lambda a, b: brute_nearest(a, b)),
+        ("nearest k (Pending)", lambda a, b: index.nearest(a, b, args.k, {"status": "Pending"}),
+         lambda a, b: brute_nearest(a, b, True)),
+        (f"within {args.radius_km:g} km", lambda a, b: index.within(a, b, args.radius_km), brute_within),
+    ]
+    print(f"{'query':<22}{'index ms':>10}{'brute ms':>10}")
+    for name, fast, slow in rows:
+        print(f"{name:<22}{per_query_ms(fast, queries):>10.3f}{per_query_ms(slow, queries):>10.3f}")
+
+    # inserts go to the delta buffer until it triggers a rebuild
+    extra, _, _, _ = make_docs(1000, rng)
+    for doc in extra:
+        doc["_id"] = "x" + doc["_id"]
+    with Timer() as inserts:
+        for doc in extra:
+            index.upsert(doc)
+    print(f"1000 upserts: {inserts.ms:.1f} ms   nearest k with a full delta: "
+          f"{per_query_ms(lambda a, b: index.nearest(a, b, args.k), queries):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cold-start benchmark: time to import ``app.main`` and per-worker memory.
+
+Each scenario runs in a fresh interpreter against a scratch copy of the
+artifacts (with a synthetic 500-tree flood model standing in when
+rf_flood_model.pkl is absent) and reports import time, model-load time and
+RSS split into anonymous (private to the worker) and file-backed
+(shareable through the page cache) memory.
+
+    python benchmarks/bench_startup.py
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import common  # noqa: F401  (puts backend/ on sys.path)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_ARTIFACTS = os.path.join(BACKEND_DIR, "app", "ml_models", "artifacts")
+
+CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+from app.ml_models.loader import artifacts
+if PRELOAD:
+    artifacts.preload()
+    artifacts.rf_flood_model.predict_proba([[0.0] * 7])
+t2 = time.perf_counter()
+status = dict(line.split(":", 1) for line in open("/proc/self/status") if line.startswith(("VmRSS", "RssAnon", "RssFile")))
+mb = lambda key: int(status[key].split()[0]) / 1024
+print(json.dumps({"import_s": t1 - t0, "load_s": t2 - t1, "rss": mb("VmRSS"), "anon": mb("RssAnon"), "file": mb("RssFile")}))
+"""
+
+
+def prepare_artifacts(directory, trees):
+    shutil.copytree(SOURCE_ARTIFACTS, directory, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns("routing", "compiled"))
+    flood_path = os.path.join(directory, "models", "rf_flood_model.pkl")
+    if not os.path.exists(flood_path):
+        import joblib
+        import numpy as np
+        from sklearn.ensemble import RandomForestClassifier
+
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(5000, 7))
+        y = (X[:, 4] + rng.normal(scale=0.5, size=len(X)) > 0.8).astype(int)
+        model = RandomForestClassifier(n_estimators=trees, max_depth=10, random_state=0).fit(X, y)
+        joblib.dump(model, flood_path)
+
+
+def run(label, directory, engine, preload):
+    env = dict(os.environ, ML_ARTIFACTS_DIR=directory, ML_ENGINE=engine, PYTHONWARNINGS="ignore")
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017/minarah")
+    env.setdefault("SECRET_KEY", "benchmark")
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.replace("PRELOAD", str(preload))],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    r = json.loads(out.stdout.strip().splitlines()[-1])
+    print(f"{label:<32} import {r['import_s']:5.2f} s  load {r['load_s']:5.2f} s  "
+          f"RSS {r['rss']:6.1f} MB (private {r['anon']:6.1f}, shared-file {r['file']:5.1f})")
+
+
+def main(args):
+    directory = tempfile.mkdtemp(prefix="minarah-artifacts-")
+    try:
+        prepare_artifacts(directory, args.trees)
+        run("lazy (import only)", directory, "sklearn", False)
+        run("sklearn, models loaded", directory, "sklearn", True)
+        run("compiled, first start (builds)", directory, "compiled", True)
+        run("compiled, mmap'd tables", directory, "compiled", True)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=500)
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+WebSocket fan-out benchmark with in-process fake sockets.
+
+Broadcasts a burst of alerts to N clients, a fraction of which are slow
+(each send sleeps), and reports how long the fast clients wait for every
+alert plus the manager's own metrics.
+
+    python benchmarks/bench_ws_fanout.py --clients 10000 --slow 0.01 --messages 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017/minarah")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from common import Timer  # noqa: E402
+from app.websockets.ws_manager import ConnectionManager  # noqa: E402
+
+
+class FakeSocket:
+    def __init__(self, delay):
+        self.delay = delay
+        self.received = 0
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000):
+        pass
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+        if self.received >= self.expected:
+            self.done.set()
+
+
+async def main(args):
+    manager = ConnectionManager(queue_size=args.queue, send_timeout=5.0)
+    slow_every = int(1 / args.slow) if args.slow else 0
+    sockets = []
+    for i in range(args.clients):
+        socket = FakeSocket(args.slow_delay if slow_every and i % slow_every == 0 else 0)
+        socket.expected = args.messages
+        await manager.connect(socket)
+        sockets.append(socket)
+
+    fast = [s for s in sockets if not s.delay]
+    with Timer() as t_broadcast:
+        for m in range(args.messages):
+            await manager.broadcast({"type": "NEW_SOS", "seq": m, "priority": "Critical"})
+    start = time.perf_counter()
+    await asyncio.gather(*(s.done.wait() for s in fast))
+    fast_ms = (time.perf_counter() - start) * 1000 + t_broadcast.ms
+
+    print(f"{args.clients:,} clients ({len(sockets) - len(fast)} slow), {args.messages} messages")
+    print(f"broadcast calls returned in {t_broadcast.ms:.1f} ms; all fast clients served in {fast_ms:.1f} ms")
+    print(manager.metrics())
+
+    for socket in list(manager.active_connections):
+        manager.disconnect(socket)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--slow", type=float, default=0.01, help="fraction of slow clients")
+    parser.add_argument("--slow-delay", type=float, default=1.0, help="seconds per send for slow clients")
+    parser.add_argument("--queue", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
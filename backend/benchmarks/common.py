@@ -0,0 +1,56 @@
+"""Shared helpers for the benchmark scripts (run from the backend/ directory)."""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.road_graph import RoadGraph  # noqa: E402
+from app.utils.geo_utils import haversine_km_np  # noqa: E402
+
+
+def make_grid_graph(num_nodes: int, seed: int = 42, origin=(24.86, 67.00), spacing_deg=0.001):
+    """
+    City-like synthetic road graph: a square lattice of ~num_nodes junctions
+    around ``origin`` with two-way roads between 4-neighbours.  Road weights
+    are the straight-line length times a random detour factor in [1, 1.5),
+    and ~5% of the roads are missing so routes are not trivially straight.
+    """
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(num_nodes)))
+    n = side * side
+
+    rows, cols = np.divmod(np.arange(n), side)
+    lat = origin[0] + rows * spacing_deg + rng.uniform(-0.2, 0.2, n) * spacing_deg
+    lng = origin[1] + cols * spacing_deg + rng.uniform(-0.2, 0.2, n) * spacing_deg
+
+    idx = np.arange(n).reshape(side, side)
+    right = np.stack([idx[:, :-1].ravel(), idx[:, 1:].ravel()], axis=1)
+    down = np.stack([idx[:-1, :].ravel(), idx[1:, :].ravel()], axis=1)
+    pairs = np.concatenate([right, down])
+    pairs = pairs[rng.random(len(pairs)) >= 0.05]
+
+    u, v = pairs[:, 0], pairs[:, 1]
+    w = haversine_km_np(lat[u], lng[u], lat[v], lng[v]) * rng.uniform(1.0, 1.5, len(pairs))
+
+    sources = np.concatenate([u, v])
+    targets = np.concatenate([v, u])
+    weights = np.concatenate([w, w])
+    ids = [f"n{i}" for i in range(n)]
+
+    return RoadGraph.from_edges(ids, lat, lng, sources, targets, weights)
+
+
+def random_pairs(graph: RoadGraph, count: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, graph.num_nodes, size=(count, 2)).tolist()
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000
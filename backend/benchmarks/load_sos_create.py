@@ -0,0 +1,55 @@
+"""
+Concurrent SOS creation load test against a running backend.
+
+Start the API (uvicorn app.main:app) against a scratch database, then:
+
+    python benchmarks/load_sos_create.py --url http://localhost:8000 --requests 2000 --concurrency 64
+
+Reports throughput and latency percentiles; run it on the commit before and
+after a change to compare.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+PRIORITIES = ["Critical", "High", "Medium", "Low"]
+
+
+def create(session, url, i):
+    start = time.perf_counter()
+    response = session.post(f"{url}/sos/sos/create", json={
+        "email": f"load{i}@minarah.pk",
+        "name": f"Load Test {i}",
+        "province": "Sindh",
+        "area": "Karachi",
+        "location": "benchmark",
+        "issue": "load test",
+        "priority": PRIORITIES[i % len(PRIORITIES)],
+    }, timeout=30)
+    return time.perf_counter() - start, response.status_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(lambda i: create(session, args.url, i), range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([r[0] for r in results]) * 1000
+    errors = sum(1 for r in results if r[1] != 200)
+    print(f"{args.requests} requests, concurrency {args.concurrency}: "
+          f"{args.requests / elapsed:.0f} req/s, errors {errors}")
+    print(f"latency ms  p50 {np.percentile(latencies, 50):.1f}  "
+          f"p95 {np.percentile(latencies, 95):.1f}  p99 {np.percentile(latencies, 99):.1f}")